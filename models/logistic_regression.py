@@ -2,15 +2,15 @@ import sys
 
 sys.path.append("../scripts")
 from base_model import TextAnalyticsFunctions
-from sklearn.model_selection import StratifiedKFold, GridSearchCV
+from sklearn.model_selection import StratifiedKFold
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.linear_model import LogisticRegression
 from sklearn.pipeline import Pipeline
 from sklearn.preprocessing import FunctionTransformer
-import nltk
-from nltk.stem import PorterStemmer
-from nltk.corpus import stopwords
 from variables import SEED
+from text_processing import get_normalizer
+from instrumentation import hook
+from cached_search import cached_grid_search
 
 
 class TextAnalyticsModel(TextAnalyticsFunctions):
@@ -23,32 +23,21 @@ class TextAnalyticsModel(TextAnalyticsFunctions):
         self.model_type = "ml"
 
         # Add other variables you need to persist across the model
+        self.preprocessed_input = True
 
     def preprocess_text(self, text_list):
-        processed_texts = []
-        for text in text_list:
-            # Tokenization
-            words = nltk.word_tokenize(text)
+        with hook("preprocess_text", len(text_list)):
+            return get_normalizer().normalize_all(text_list)
 
-            # Remove stopwords
-            stop_words = set(stopwords.words("english"))
-            words = [word for word in words if word.lower() not in stop_words]
-
-            # Stemming
-            stemmer = PorterStemmer()
-            words = [stemmer.stem(word) for word in words]
-
-            processed_texts.append(" ".join(words))
-
-        return processed_texts
-
-    def train_ml_model(self, training_text, training_labels):
+    def train_ml_model(self, training_text, training_labels, preprocessed_text=None):
         model = None
-        print(self.sdg, sum(training_labels))
         # Implement machine learning-based training logic
+        # Preprocess once up front rather than in every grid search fit
+        if preprocessed_text is None:
+            preprocessed_text = self.preprocess_text(training_text)
+
         pipeline = Pipeline(
             [
-                ("preprocessor", FunctionTransformer(self.preprocess_text)),
                 ("tfidf", TfidfVectorizer()),
                 ("classifier", LogisticRegression()),
             ]
@@ -63,30 +52,44 @@ class TextAnalyticsModel(TextAnalyticsFunctions):
         }
 
         skf = StratifiedKFold(n_splits=5, random_state=SEED, shuffle=True)
-        grid_search = GridSearchCV(pipeline, hyperparameters, cv=skf, n_jobs=-1)
-
-        grid_search.fit(list(training_text), list(training_labels))
-        model = grid_search.best_estimator_
+        grid_search = cached_grid_search(
+            pipeline,
+            hyperparameters,
+            skf,
+            list(preprocessed_text),
+            list(training_labels),
+            n_jobs=self.n_jobs,
+        )
+        model = Pipeline(
+            [
+                ("preprocessor", FunctionTransformer(self.preprocess_text)),
+                *grid_search.best_estimator_.steps,
+            ]
+        )
         # End of implementation
 
         return model
 
     def predict_ml_model(self, text):
-        metadata = {}
-        prediction = 0
+        return self.predict_ml_batch([text])[0]
+
+    def predict_ml_batch(self, texts):
+        results = []
+        if len(texts) == 0:
+            return results
 
-        # Implement machine learning-based prediction logic
-        #
-        predicted_probs = self.model.predict_proba([text])
+        # Score the whole batch with a single vectorized call
+        predicted_probs = self.model.predict_proba(list(texts))
 
         # Find the class with the highest probability
-        prediction = predicted_probs.argmax(axis=1)[0]
-        highest_probability = predicted_probs[0, prediction]
+        predictions = predicted_probs.argmax(axis=1)
+        highest_probabilities = predicted_probs[range(len(predictions)), predictions]
 
-        metadata["confidence"] = highest_probability
-        # End of implementation
+        for prediction, highest_probability in zip(predictions, highest_probabilities):
+            metadata = {"confidence": highest_probability}
+            results.append((prediction, metadata))
 
-        return prediction, metadata
+        return results
 
 
 def main():
@@ -1,7 +1,7 @@
 from scripts.base_model import TextAnalyticsFunctions
+from scripts.keyword_matcher import KeywordMatcher, MultiSDGKeywordMatcher
+from scripts.keyword_resources import load_keywords
 from sklearn.model_selection import KFold, GridSearchCV
-import pandas as pd
-import re
 
 
 class TextAnalyticsModel(TextAnalyticsFunctions):
@@ -14,32 +14,83 @@ class TextAnalyticsModel(TextAnalyticsFunctions):
         # self.model_type = "ml"
 
         # Add other variables you need to persist across the model
-        self.dictionary = self.load_dict()
+        # Only this SDG's keywords are kept, the matcher is rebuilt when loaded
+        self.keywords = load_keywords()[self.sdg]
+        self.matcher = KeywordMatcher(self.keywords)
 
-    def load_dict(self):
-        path = "./models/resources/uoft_sdg_keywords.xlsx"
-        df = pd.read_excel(path)
-        df["Keywords"] = df["Keywords"].apply(
-            lambda s: [t.strip() for t in s.split(",")]
-        )
-        return dict(zip(df["SDG"], df["Keywords"]))
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["matcher"]
+        return state
 
-    def predict_rules_model(self, text):
-        metadata = {"keyword_matches": []}
-        prediction = 0
+    def __setstate__(self, state):
+        # Models saved before only the SDG's keywords were kept
+        if "dictionary" in state:
+            state = state.copy()
+            state["keywords"] = state.pop("dictionary")[state["sdg"]]
+            state.pop("matcher", None)
+
+        self.__dict__.update(state)
+        self.matcher = KeywordMatcher(self.keywords)
 
+    def predict_rules_model(self, text):
         # Implement rules-based prediction logic
-        for keyword in self.dictionary[self.sdg]:
-            query = rf"\b{keyword}"
-            match = bool(re.search(query, text))
-            if match:
-                metadata["keyword_matches"].append(keyword)
-                prediction = 1
+        keyword_matches, spans = self.matcher.match(text)
+        prediction, metadata = keyword_prediction(keyword_matches, spans)
         # End of implementation
 
         return prediction, metadata
 
 
+class MultiSDGModel:
+    """
+    Rules model that scores every SDG with a single keyword scan per text.
+
+    Used by `predict_models(..., multi_sdg=True)` in place of the saved per-SDG
+    models, since the rules don't need training.
+    """
+
+    def __init__(self, sdgs):
+        """
+        Parameters:
+            - sdgs (list[str]): The SDGs to make predictions for.
+        """
+        dictionary = load_keywords()
+        self.matcher = MultiSDGKeywordMatcher({sdg: dictionary[sdg] for sdg in sdgs})
+
+    def predict_batch(self, texts):
+        """
+        Generate predictions for every SDG.
+
+        Parameters:
+            - texts (list[str]): Texts to score.
+
+        Returns:
+            - dict: Maps each SDG to a list of prediction dicts (see
+                `TextAnalyticsFunctions.predict`), one per text.
+        """
+        predictions = {sdg: [] for sdg in self.matcher.dictionary}
+        for text in texts:
+            for sdg, (keyword_matches, spans) in self.matcher.match(text).items():
+                prediction, metadata = keyword_prediction(keyword_matches, spans)
+                predictions[sdg].append(
+                    dict(category=sdg, prediction=prediction, metadata=metadata)
+                )
+        return predictions
+
+
+def keyword_prediction(keyword_matches, spans):
+    metadata = {"keyword_matches": [], "spans": []}
+    prediction = 0
+
+    if keyword_matches:
+        metadata["keyword_matches"] = keyword_matches
+        metadata["spans"] = spans
+        prediction = 1
+
+    return prediction, metadata
+
+
 def main():
     pass
 
@@ -0,0 +1,167 @@
+import sys
+
+sys.path.append(".")
+sys.path.append("./scripts")
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+from scoring_service import score_texts, load_predictors
+from prediction_cache import text_hash
+
+# Predictors of a worker process, loaded once by `init_worker`
+WORKER_PREDICTORS = {}
+
+
+def init_worker(ignore_models):
+    """Load the predictors of every saved model in a worker process."""
+    WORKER_PREDICTORS.update(load_predictors(ignore_models)[0])
+
+
+def score_worker_texts(texts):
+    """Score texts with the predictors of a worker process (see `score_texts`)."""
+    return score_texts(WORKER_PREDICTORS, texts)
+
+
+class AsyncScorer:
+    """
+    Asyncio front-end that scores texts in a process pool.
+
+    Requests for a text that is already being scored wait for the same result
+    instead of scoring it again. Distinct texts requested within `batch_window`
+    seconds of each other are scored together in one call to `score_batch`, which
+    runs in `executor` so the event loop never blocks on preprocessing or
+    inference.
+    """
+
+    def __init__(self, score_batch, executor, batch_window=0.005, max_batch_size=256):
+        """
+        Parameters:
+            - score_batch (callable): Picklable function that takes a list of texts
+                and returns one prediction per text, e.g. `score_worker_texts`.
+            - executor (concurrent.futures.Executor): Where `score_batch` runs.
+            - batch_window (float): Seconds to collect requests before scoring them.
+            - max_batch_size (int): Most texts scored at once. A full batch is
+                scored without waiting for the window to end.
+        """
+        self.score_batch = score_batch
+        self.executor = executor
+        self.batch_window = batch_window
+        self.max_batch_size = max_batch_size
+
+        # Futures of the texts being scored, and of those waiting for a batch, by
+        # content hash
+        self.in_flight = {}
+        self.pending = {}
+        self.flush_handle = None
+
+        self.n_requests = 0
+        self.n_coalesced = 0
+        self.n_batches = 0
+        self.n_scored = 0
+
+    async def predict(self, text):
+        """
+        Score a text, sharing the work with identical in-flight requests.
+
+        Parameters:
+            - text (str): The text to score.
+
+        Returns:
+            - The prediction `score_batch` made for the text.
+        """
+        self.n_requests += 1
+        key = text_hash(text)
+        future = self.in_flight.get(key)
+        if future is not None:
+            self.n_coalesced += 1
+            return await asyncio.shield(future)
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self.in_flight[key] = future
+        self.pending[key] = text
+
+        if len(self.pending) >= self.max_batch_size:
+            self.flush()
+        elif self.flush_handle is None:
+            self.flush_handle = loop.call_later(self.batch_window, self.flush)
+        return await asyncio.shield(future)
+
+    async def predict_batch(self, texts):
+        """Score texts concurrently, see `predict`."""
+        return await asyncio.gather(*(self.predict(text) for text in texts))
+
+    def flush(self):
+        """Send the pending texts to the executor as one batch."""
+        if self.flush_handle is not None:
+            self.flush_handle.cancel()
+            self.flush_handle = None
+        if len(self.pending) == 0:
+            return
+
+        batch, self.pending = self.pending, {}
+        self.n_batches += 1
+        self.n_scored += len(batch)
+        loop = asyncio.get_running_loop()
+        scoring = loop.run_in_executor(
+            self.executor, self.score_batch, list(batch.values())
+        )
+        scoring.add_done_callback(lambda scoring: self.resolve(batch, scoring))
+
+    def resolve(self, batch, scoring):
+        """Hand the predictions of a scored batch to the requests waiting for them."""
+        # Scoring is cancelled e.g. when the event loop shuts down
+        cancelled = scoring.cancelled()
+        error = None if cancelled else scoring.exception()
+        if cancelled or error:
+            predictions = [None] * len(batch)
+        else:
+            predictions = scoring.result()
+        for key, prediction in zip(batch, predictions):
+            future = self.in_flight.pop(key)
+            if future.done():
+                continue
+            if cancelled:
+                future.cancel()
+            elif error:
+                future.set_exception(error)
+            else:
+                future.set_result(prediction)
+
+    def stats(self):
+        """
+        Get the front-end's counters.
+
+        Returns:
+            - dict: Number of requests, requests answered by an identical in-flight
+                request, batches and texts scored, and texts waiting to be scored.
+        """
+        return dict(
+            requests=self.n_requests,
+            coalesced=self.n_coalesced,
+            batches=self.n_batches,
+            scored=self.n_scored,
+            in_flight=len(self.in_flight),
+        )
+
+
+def load_async_scorer(
+    max_workers=None, ignore_models=[], batch_window=0.005, max_batch_size=256
+):
+    """
+    Start a process pool whose workers each load every saved model, and an
+    AsyncScorer that scores texts with it.
+
+    Parameters:
+    - max_workers (int): Number of worker processes. Defaults to one per core.
+    - ignore_models (list[str]): Model names to leave out.
+    - batch_window (float): See `AsyncScorer`.
+    - max_batch_size (int): See `AsyncScorer`.
+
+    Returns:
+    - AsyncScorer: The scorer. Its predictions are those of `score_texts`. Shut
+        down its executor when done.
+    """
+    executor = ProcessPoolExecutor(
+        max_workers=max_workers, initializer=init_worker, initargs=(ignore_models,)
+    )
+    return AsyncScorer(score_worker_texts, executor, batch_window, max_batch_size)
@@ -1,4 +1,8 @@
 import dill
+import sys
+
+sys.path.append("./scripts")
+from instrumentation import hook
 
 
 class TextAnalyticsFunctions:
@@ -6,19 +10,35 @@ class TextAnalyticsFunctions:
         self.sdg = sdg
         self.model_type = None
         self.model = None
+        # Set to True if train_ml_model accepts text already normalized by
+        # `text_processing.get_normalizer()` through `preprocessed_text`
+        self.preprocessed_input = False
+        # Number of cores the model may use while training
+        self.n_jobs = -1
+        # See `use_prediction_cache`
+        self.prediction_cache = None
+        self.model_hash = None
 
-    def train(self, training_text, training_labels):
+    def train(self, training_text, training_labels, preprocessed_text=None):
         """
         Train model using set of text and expected labels.
 
         Parameters:
             - training_text (list or array-like): Input features.
             - training_labels (list or array-like): Target labels (binary).
+            - preprocessed_text (list or array-like): Normalized version of
+                training_text, only used by models with `preprocessed_input` set.
         """
         if self.model_type == "rules":
             self.model = "ignore"
+        elif self.model_type == "ml" and self.preprocessed_input:
+            with hook("train_ml_model", len(training_text)):
+                self.model = self.train_ml_model(
+                    training_text, training_labels, preprocessed_text=preprocessed_text
+                )
         elif self.model_type == "ml":
-            self.model = self.train_ml_model(training_text, training_labels)
+            with hook("train_ml_model", len(training_text)):
+                self.model = self.train_ml_model(training_text, training_labels)
         else:
             raise ValueError(
                 "Invalid model type. Supported types are 'rules' and 'ml'."
@@ -57,10 +77,15 @@ class TextAnalyticsFunctions:
         if self.model is None:
             raise ValueError("Model not trained. Call train() first.")
 
+        if self.get_prediction_cache() is not None:
+            return self.predict_batch([text])[0]
+
         if self.model_type == "rules":
-            prediction, metadata = self.predict_rules_model(text)
+            with hook("predict_rules_model"):
+                prediction, metadata = self.predict_rules_model(text)
         elif self.model_type == "ml":
-            prediction, metadata = self.predict_ml_model(text)
+            with hook("predict_ml_model"):
+                prediction, metadata = self.predict_ml_model(text)
         else:
             raise ValueError(
                 "Invalid model type. Supported types are 'rules' and 'ml'."
@@ -68,15 +93,109 @@ class TextAnalyticsFunctions:
 
         return dict(category=self.sdg, prediction=prediction, metadata=metadata)
 
+    def predict_batch(self, texts):
+        """
+        Generate SDG predictions for a batch of texts.
+
+        Models can override `predict_ml_batch` or `predict_rules_batch` to score the
+        whole batch at once (e.g. one vectorized `predict_proba` call). By default
+        each text is scored individually. If a prediction cache is set (see
+        `use_prediction_cache`), only texts without a cached prediction are scored.
+
+        Parameters:
+        - texts (list[str]): Outlines or course descriptions to make predictions for.
+
+        Returns:
+        list[dict]: One prediction dict per text, in the same order and format as
+            the output of `predict`.
+        """
+        if self.model is None:
+            raise ValueError("Model not trained. Call train() first.")
+
+        prediction_cache = self.get_prediction_cache()
+        if prediction_cache is not None:
+            return prediction_cache.predict_batch(
+                list(texts), self.sdg, self.model_hash, self.score_batch
+            )
+        return self.score_batch(texts)
+
+    def score_batch(self, texts):
+        """
+        Score a batch of texts without looking up cached predictions, see
+        `predict_batch`.
+        """
+        if self.model_type == "rules":
+            with hook("predict_rules_batch", len(texts)):
+                results = self.predict_rules_batch(texts)
+        elif self.model_type == "ml":
+            with hook("predict_ml_batch", len(texts)):
+                results = self.predict_ml_batch(texts)
+        else:
+            raise ValueError(
+                "Invalid model type. Supported types are 'rules' and 'ml'."
+            )
+
+        return [
+            dict(category=self.sdg, prediction=prediction, metadata=metadata)
+            for prediction, metadata in results
+        ]
+
+    def use_prediction_cache(self, prediction_cache, model_hash):
+        """
+        Reuse the predictions cached for this model, and cache new ones.
+
+        Parameters:
+            - prediction_cache (PredictionCache): The cache, see
+                `prediction_cache.py`. None to stop using a cache.
+            - model_hash (str): Hash of the saved model (see
+                `model_registry.model_hash`), so predictions of other versions of
+                the model aren't reused.
+        """
+        self.prediction_cache = prediction_cache
+        self.model_hash = model_hash
+
+    def get_prediction_cache(self):
+        # Models saved before prediction caching don't have the attribute
+        return getattr(self, "prediction_cache", None)
+
+    def predict_rules_batch(self, texts):
+        """
+        Score a batch of texts with the rules model, one text at a time.
+
+        Parameters:
+            - texts (list[str]): Texts to score.
+
+        Returns:
+            - list[tuple]: (prediction, metadata) for each text.
+        """
+        return [self.predict_rules_model(text) for text in texts]
+
+    def predict_ml_batch(self, texts):
+        """
+        Score a batch of texts with the ML model, one text at a time.
+
+        Parameters:
+            - texts (list[str]): Texts to score.
+
+        Returns:
+            - list[tuple]: (prediction, metadata) for each text.
+        """
+        return [self.predict_ml_model(text) for text in texts]
+
     def save(self, file_path):
         """
-        Save the entire class to a file.
+        Save the entire class to a file. The prediction cache isn't saved.
 
         Parameters:
             - file_path (str): File path to save the model.
         """
-        with open(file_path, "wb") as file:
-            dill.dump(self, file)
+        prediction_cache = self.get_prediction_cache()
+        self.prediction_cache = None
+        try:
+            with open(file_path, "wb") as file:
+                dill.dump(self, file)
+        finally:
+            self.prediction_cache = prediction_cache
 
     def __repr__(self):
         return f"{self.sdg}__{self.model_type}__{self.model}"
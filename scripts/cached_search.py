@@ -0,0 +1,118 @@
+import functools
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append("./scripts")
+from joblib import Memory
+from sklearn.model_selection import GridSearchCV, ParameterGrid
+from variables import VECTORIZER_CACHE_DIR, VECTORIZER_CACHE_BYTES_LIMIT
+
+
+class CallLogMemory(Memory):
+    """
+    joblib Memory that logs every call of its cached functions to a file, as "call",
+    and every call answered from the cache, as "hit". The log is a file so that the
+    calls made in the grid search's worker processes are logged too.
+    """
+
+    def __init__(self, location, log_path, **kwargs):
+        super().__init__(location, **kwargs)
+        self.log_path = log_path
+
+    def log(self, event):
+        # A single append per event, so that events of concurrent processes don't mix
+        with open(self.log_path, "a") as file:
+            file.write(event + "\n")
+
+    def log_hit(self, metadata):
+        self.log("hit")
+        return True
+
+    def cache(self, func=None, **kwargs):
+        if func is None:
+            return functools.partial(self.cache, **kwargs)
+        memorized = super().cache(
+            func, cache_validation_callback=self.log_hit, **kwargs
+        )
+
+        @functools.wraps(func)
+        def logged(*args, **kwargs):
+            self.log("call")
+            return memorized(*args, **kwargs)
+
+        return logged
+
+
+def cached_grid_search(
+    pipeline,
+    hyperparameters,
+    cv,
+    training_text,
+    training_labels,
+    n_jobs=-1,
+    cache_dir=VECTORIZER_CACHE_DIR,
+):
+    """
+    Run GridSearchCV, fitting each transformer configuration only once per fold.
+
+    The pipeline's transformers (e.g. the TF-IDF vectorizer) are cached on disk with
+    `memory=`, so sweeping the classifier's parameters reuses the fitted vectorizer
+    and its sparse matrix instead of refitting it. The cache isn't trimmed here,
+    since other searches may be using it; see `reduce_vectorizer_cache`.
+
+    Parameters:
+    - pipeline (Pipeline): Pipeline whose final step is the classifier.
+    - hyperparameters (dict): The parameter grid.
+    - cv: Cross-validation splitter.
+    - training_text (list): Input features.
+    - training_labels (list): Target labels.
+    - n_jobs (int): Number of jobs to run in parallel.
+    - cache_dir (str): Directory of the on-disk cache.
+
+    Returns:
+    - GridSearchCV: The fitted search, with the cache detached from `best_estimator_`.
+    """
+    log_file, log_path = tempfile.mkstemp(suffix=".log")
+    os.close(log_file)
+    try:
+        memory = CallLogMemory(cache_dir, log_path, verbose=0)
+        pipeline.set_params(memory=memory)
+        grid_search = GridSearchCV(pipeline, hyperparameters, cv=cv, n_jobs=n_jobs)
+
+        start = time.perf_counter()
+        grid_search.fit(training_text, training_labels)
+        elapsed = time.perf_counter() - start
+
+        with open(log_path) as file:
+            events = file.read().split()
+    finally:
+        os.remove(log_path)
+
+    n_fits = len(ParameterGrid(hyperparameters)) * cv.get_n_splits()
+    n_calls = events.count("call")
+    n_hits = events.count("hit")
+    print(
+        f"Grid search: {n_fits} fits in {elapsed:.1f}s, "
+        f"{n_hits} of {n_calls} vectorizer fits saved by caching"
+    )
+
+    grid_search.best_estimator_.set_params(memory=None)
+    return grid_search
+
+
+def reduce_vectorizer_cache(
+    cache_dir=VECTORIZER_CACHE_DIR, bytes_limit=VECTORIZER_CACHE_BYTES_LIMIT
+):
+    """
+    Trim the on-disk cache of `cached_grid_search`, dropping its oldest entries.
+
+    Call it once no search is running, since trimming could remove entries a running
+    search is reading.
+
+    Parameters:
+    - cache_dir (str): Directory of the on-disk cache.
+    - bytes_limit (int or str): Maximum size of the cache, e.g. "2G".
+    """
+    Memory(cache_dir, verbose=0).reduce_size(bytes_limit=bytes_limit)
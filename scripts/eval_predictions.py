@@ -3,33 +3,52 @@ from scripts.variables import (
     PROJECTNAME_DATA_PATHS,
     PREDICTIONS_TEMPLATE,
     ALL_EVAL_RESULTS_PATH,
+    EVAL_MANIFEST_PATH,
 )
-from scripts.file_org import load_data
+from scripts.file_org import load_data, write_data, file_hash, data_hash
+from scripts.instrumentation import stage
+from concurrent.futures import ProcessPoolExecutor
+import json
 import os
 import numpy as np
 from glob import glob
 import pandas as pd
 
 
-def iter_prediction_files():
-    for filepath in glob(PREDICTIONS_TEMPLATE()):
-        predictions = load_data(filepath)
-        yield filepath, predictions
-
-
-def load_original_file(prediction_path):
+def get_original_path(prediction_path):
     filename = os.path.basename(prediction_path)
     sdg, model_name, project_name, datatype = GET_PREDICTION_DETAILS(filename)
+    return PROJECTNAME_DATA_PATHS[datatype](sdg, project_name)
+
 
-    original_filepath = PROJECTNAME_DATA_PATHS[datatype](sdg, project_name)
-    original_data = load_data(original_filepath)
+def group_prediction_files():
+    """
+    Group prediction files by the original split they were made from.
 
-    return sdg, model_name, project_name, datatype, original_data
+    Returns:
+    - dict: Maps each original split path to the sorted prediction paths made from it.
+    """
+    groups = {}
+    for filepath in sorted(glob(PREDICTIONS_TEMPLATE())):
+        groups.setdefault(get_original_path(filepath), []).append(filepath)
+    return groups
 
 
-def get_original_label(original_data, sdg, index):
-    original_label = int(sdg in original_data.loc[index]["labels"])
-    return original_label
+def get_original_labels(original_data, sdg, indices):
+    """
+    Look up whether each of the given original rows is labelled with an SDG.
+
+    Parameters:
+    - original_data (pd.DataFrame): The original split, with a "labels" column.
+    - sdg (str): The SDG to check for.
+    - indices (array-like): Index values of the rows to look up.
+
+    Returns:
+    - np.ndarray: 1/0 for each index.
+    """
+    labels = original_data["labels"].explode()
+    has_sdg = (labels == sdg).groupby(level=0).any()
+    return has_sdg.loc[indices].to_numpy().astype(int)
 
 
 def get_metrics(comparison_counts):
@@ -55,46 +74,203 @@ def get_metrics(comparison_counts):
     return dict(precision=precision, recall=recall, f1=f1, TP=TP, FP=FP, TN=TN, FN=FN)
 
 
-def compare(pred, ori):
-    if pred == 1 and ori == 1:
-        return "TP"
-    elif pred == 1 and ori == 0:
-        return "FP"
-    elif pred == 0 and ori == 1:
-        return "FN"
-    elif pred == 0 and ori == 0:
-        return "TN"
+def compare_all(preds, oris):
+    """
+    Compare predicted labels against original labels.
 
+    Parameters:
+    - preds (array-like): Predicted 1/0 labels.
+    - oris (array-like): Original 1/0 labels.
 
-def eval_predictions():
-    all_results = []
-    for filepath, predictions in iter_prediction_files():
-        sdg, model_name, project_name, datatype, original_data = load_original_file(
-            filepath
-        )
+    Returns:
+    - np.ndarray: "TP", "FP", "FN" or "TN" for each pair, None if either isn't 1/0.
+    """
+    preds = np.asarray(preds)
+    oris = np.asarray(oris)
+    conditions = [
+        (preds == 1) & (oris == 1),
+        (preds == 1) & (oris == 0),
+        (preds == 0) & (oris == 1),
+        (preds == 0) & (oris == 0),
+    ]
+    return np.select(conditions, ["TP", "FP", "FN", "TN"], default=None)
 
-        all_comparisons = []
-        original_labels = []
-        for i, prediction in predictions.iterrows():
-            original_label = get_original_label(original_data, sdg, prediction["index"])
-            comparison = compare(prediction["prediction"]["prediction"], original_label)
-            all_comparisons.append(comparison)
-            original_labels.append(original_label)
-
-        predictions["original_label"] = original_labels
-        predictions["comparison"] = all_comparisons
-        overall_comparisons = dict(predictions.value_counts("comparison"))
-        all_results.append(
-            dict(
-                sdg=sdg,
-                model_name=model_name,
-                project_name=project_name,
-                datatype=datatype,
-                **get_metrics(overall_comparisons),
-            )
-        )
 
-        predictions.to_json(filepath, orient="records", lines=True)
-    pd.DataFrame(all_results).to_json(
-        ALL_EVAL_RESULTS_PATH, orient="records", lines=True
+def count_comparisons(comparisons):
+    """Count how often each of "TP", "FP", "TN" and "FN" occurs."""
+    return {
+        comparison: np.sum(comparisons == comparison)
+        for comparison in ["TP", "FP", "TN", "FN"]
+    }
+
+
+def eval_prediction_file(filepath, original_data):
+    """
+    Compare a prediction file against the original labels and add the comparison
+    columns to it.
+
+    Parameters:
+    - filepath (str): Path to the prediction file, which is rewritten.
+    - original_data (pd.DataFrame): The split the predictions were made on.
+
+    Returns:
+    - dict: Details of the prediction file with its metrics (see `get_metrics`).
+    """
+    filename = os.path.basename(filepath)
+    sdg, model_name, project_name, datatype = GET_PREDICTION_DETAILS(filename)
+    predictions = load_data(filepath)
+
+    original_labels = get_original_labels(original_data, sdg, predictions["index"])
+    predicted_labels = predictions["prediction"].map(
+        lambda prediction: prediction["prediction"]
+    )
+    comparisons = compare_all(predicted_labels, original_labels)
+
+    predictions["original_label"] = original_labels
+    predictions["comparison"] = comparisons
+    write_data(predictions, filepath)
+
+    return dict(
+        sdg=sdg,
+        model_name=model_name,
+        project_name=project_name,
+        datatype=datatype,
+        **get_metrics(count_comparisons(comparisons)),
     )
+
+
+def eval_prediction_group(original_path, prediction_paths):
+    """
+    Evaluate every prediction file made from the same original split, loading the
+    split only once. Runs inside a worker process.
+
+    Parameters:
+    - original_path (str): Path to the original split.
+    - prediction_paths (list[str]): Prediction files made from the split.
+
+    Returns:
+    - list[dict]: The results of `eval_prediction_file` for each prediction file.
+    """
+    with stage(
+        "eval_prediction_group",
+        original_path=os.path.basename(original_path),
+        files=len(prediction_paths),
+    ) as record:
+        original_data = load_data(original_path, columns=["labels"])
+        results = [
+            eval_prediction_file(filepath, original_data)
+            for filepath in prediction_paths
+        ]
+        record["rows"] = sum(count_result_rows(result) for result in results)
+    return results
+
+
+def count_result_rows(result):
+    """Count the predictions compared against an original label in a result."""
+    return int(sum(result[comparison] for comparison in ["TP", "FP", "TN", "FN"]))
+
+
+def load_eval_manifest(path=EVAL_MANIFEST_PATH):
+    """
+    Load the manifest of previously evaluated prediction files.
+
+    Returns:
+    - dict: Maps each prediction filename to its "prediction_hash", the
+        "original_hash" of its split and its "result".
+    """
+    if not os.path.exists(path):
+        return {}
+    with open(path) as file:
+        return json.load(file)
+
+
+def save_eval_manifest(manifest, path=EVAL_MANIFEST_PATH):
+    """Save the manifest of evaluated prediction files."""
+    with open(path, "w") as file:
+        json.dump(manifest, file, indent=1)
+
+
+def to_builtin(result):
+    """Convert the numpy values of a result to builtin types so it can be saved."""
+    return {
+        key: value.item() if isinstance(value, np.generic) else value
+        for key, value in result.items()
+    }
+
+
+def eval_predictions(max_workers=None, incremental=False):
+    """
+    Evaluate every prediction file and save the metrics to ALL_EVAL_RESULTS_PATH.
+
+    Prediction files are grouped by the original split they were made from, and the
+    groups are evaluated across a process pool. Results are ordered by prediction
+    file path.
+
+    Parameters:
+    - max_workers (int): Number of worker processes. Defaults to one per core.
+    - incremental (bool): Only evaluate prediction files that are new or changed,
+        or whose original split changed, since the last run. The results of the
+        other files are reused from the manifest at EVAL_MANIFEST_PATH.
+    """
+    with stage("eval_predictions", rows=0, incremental=incremental) as record:
+        groups = group_prediction_files()
+        manifest = load_eval_manifest() if incremental else {}
+
+        all_results = {}
+        file_hashes = {}
+        original_hashes = {path: data_hash(path) for path in groups}
+        for original_path, prediction_paths in list(groups.items()):
+            for filepath in prediction_paths:
+                entry = manifest.get(os.path.basename(filepath))
+                file_hashes[filepath] = file_hash(filepath)
+                if (
+                    entry is not None
+                    and entry["prediction_hash"] == file_hashes[filepath]
+                    and entry["original_hash"] == original_hashes[original_path]
+                ):
+                    all_results[filepath] = entry["result"]
+
+            # Only evaluate the files without a reusable result
+            groups[original_path] = [
+                filepath for filepath in prediction_paths if filepath not in all_results
+            ]
+            if len(groups[original_path]) == 0:
+                del groups[original_path]
+
+        n_evaluated = sum(len(prediction_paths) for prediction_paths in groups.values())
+        print(f"Evaluating {n_evaluated} of {len(file_hashes)} prediction files")
+        record["files"] = n_evaluated
+
+        if len(groups) > 0:
+            with ProcessPoolExecutor(max_workers=max_workers) as executor:
+                futures = {
+                    executor.submit(
+                        eval_prediction_group, original_path, prediction_paths
+                    ): prediction_paths
+                    for original_path, prediction_paths in groups.items()
+                }
+                for future, prediction_paths in futures.items():
+                    results = future.result()
+                    all_results.update(zip(prediction_paths, results))
+                    record["rows"] += sum(
+                        count_result_rows(result) for result in results
+                    )
+
+        pd.DataFrame([all_results[path] for path in sorted(all_results)]).to_json(
+            ALL_EVAL_RESULTS_PATH, orient="records", lines=True
+        )
+
+        # Evaluated files were rewritten with the comparison columns, so hash them again
+        for original_path, prediction_paths in groups.items():
+            for filepath in prediction_paths:
+                file_hashes[filepath] = file_hash(filepath)
+        save_eval_manifest(
+            {
+                os.path.basename(filepath): dict(
+                    prediction_hash=file_hashes[filepath],
+                    original_hash=original_hashes[get_original_path(filepath)],
+                    result=to_builtin(all_results[filepath]),
+                )
+                for filepath in sorted(all_results)
+            }
+        )
@@ -1,5 +1,8 @@
+import numpy as np
 import pandas as pd
+from collections import OrderedDict
 from glob import glob
+import hashlib
 import os
 import sys
 
@@ -10,6 +13,8 @@ from variables import (
     DOCCANO_EXPORT_DIRS,
     DOCCANO_EXPORT_FILES,
 )
+from storage import get_storage
+from label_matrix import sdg_label
 
 
 def check_datatype(datatype):
@@ -40,20 +45,220 @@ def check_datatype_decorator(func):
     return wrapper
 
 
-def load_data(path):
+def file_hash(path):
+    """
+    Get the content hash of a file.
+
+    Parameters:
+    - path (str): Path to the file.
+
+    Returns:
+    - str: SHA-1 hex digest of the file's contents.
+    """
+    sha1 = hashlib.sha1()
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(1 << 20), b""):
+            sha1.update(block)
+    return sha1.hexdigest()
+
+
+def load_data(path, columns=None):
     """
     Loads data from the specified file path.
 
     Parameters:
-    - path (str): The file path to the data file.
+    - path (str): The file path to the data file. The storage format is picked
+        from its extension (see `storage.py`), and splits are read from the raw
+        data (see `load_split`).
+    - columns (list[str]): Only load these columns. Loads all columns by default.
 
     Returns:
     - pd.DataFrame: A Pandas DataFrame containing the loaded data.
     """
-    data = pd.read_json(path, lines=True)
+    if is_split_path(path):
+        data = load_split(path, columns=columns)
+    else:
+        data = get_storage(path).load(path, columns=columns)
     return data
 
 
+# Raw data of the most recently used projects, kept in memory so every split of a
+# project slices the same table. Maps (path, columns) to the file's modification
+# time and its data, least recently used first.
+RAW_DATA_CACHE = OrderedDict()
+RAW_DATA_CACHE_SIZE = 4
+
+
+def load_raw_data(project_name, columns=None):
+    """
+    Loads the raw data of a project, reusing the loaded table until the file changes.
+
+    Only the last RAW_DATA_CACHE_SIZE tables (by path and columns) are kept.
+
+    Parameters:
+    - project_name (str): The name of the project.
+    - columns (list[str]): Only load these columns. Loads all columns by default.
+
+    Returns:
+    - pd.DataFrame: The raw data of the project. It is shared, so don't modify it.
+    """
+    path = get_file_path("raw", project_name)
+    modified_time = os.path.getmtime(path)
+    key = (path, None if columns is None else tuple(columns))
+
+    cached = RAW_DATA_CACHE.get(key)
+    if cached is None or cached[0] != modified_time:
+        cached = (modified_time, get_storage(path).load(path, columns=columns))
+        RAW_DATA_CACHE[key] = cached
+    RAW_DATA_CACHE.move_to_end(key)
+    while len(RAW_DATA_CACHE) > RAW_DATA_CACHE_SIZE:
+        RAW_DATA_CACHE.popitem(last=False)
+    return cached[1]
+
+
+def is_split_path(path):
+    """Check if a path points to a train, dev, test or traindev split."""
+    return path.endswith(".npy")
+
+
+def get_split_details(path):
+    """
+    Extracts the SDG and project name from the path of a split.
+
+    Parameters:
+    - path (str): Path to the split, e.g. ".../SDG 1_project__train.npy".
+
+    Returns:
+    - tuple: The SDG and the project name.
+    """
+    base_name = os.path.splitext(os.path.basename(path))[0]
+    sdg, project_name = base_name.rsplit("__", maxsplit=1)[0].split("_", maxsplit=1)
+    return sdg, project_name
+
+
+def load_split(path, columns=None, rows=None):
+    """
+    Loads a train, dev, test or traindev split of a project.
+
+    Splits are saved as the row positions of their outlines in the project's raw
+    data, so the rows are taken from the raw data and the SDG's 1/0 "train_label"
+    column is added from the packed labels.
+
+    Parameters:
+    - path (str): Path to the split.
+    - columns (list[str]): Only load these columns. Loads all columns by default.
+    - rows (slice): Only load these rows of the split. Loads all rows by default.
+
+    Returns:
+    - pd.DataFrame: The rows of the split, indexed from 0.
+    """
+    sdg, project_name = get_split_details(path)
+    positions = np.load(path, mmap_mode="r")
+    if rows is not None:
+        positions = positions[rows]
+
+    raw_columns = None
+    if columns is not None:
+        raw_columns = [column for column in columns if column != "train_label"]
+        if "train_label" in columns and "label_bits" not in raw_columns:
+            raw_columns.append("label_bits")
+
+    raw_data = load_raw_data(project_name, raw_columns)
+    data = raw_data.take(positions).reset_index(drop=True)
+    if columns is None or "train_label" in columns:
+        data["train_label"] = sdg_label(data["label_bits"], sdg)
+    if columns is not None:
+        data = data[columns]
+    return data
+
+
+def save_split(positions, datatype, project_name, sdg):
+    """
+    Saves a split as the row positions of its outlines in the project's raw data.
+
+    Parameters:
+    - positions (array-like): Row positions in the raw data.
+    - datatype (str): The split, one of "train", "dev", "test" or "traindev".
+    - project_name (str): The name of the project.
+    - sdg (str): The SDG the split was made for.
+    """
+    path = get_file_path(datatype, project_name, sdg)
+    np.save(path, np.asarray(positions, dtype=np.int32))
+
+
+def load_rows(path, start, stop, columns=None):
+    """
+    Loads a range of rows of a raw or split data file. The project's raw data is
+    cached between calls (see `load_raw_data`), so loading many ranges of the same
+    project only reads it once.
+
+    Parameters:
+    - path (str): Path to the data file.
+    - start (int): Position of the first row to load.
+    - stop (int): Position after the last row to load.
+    - columns (list[str]): Only load these columns. Loads all columns by default.
+
+    Returns:
+    - pd.DataFrame: The rows, indexed by their position in the file.
+    """
+    if is_split_path(path):
+        data = load_split(path, columns=columns, rows=slice(start, stop))
+    else:
+        project_name = get_project_name("raw", path)
+        data = load_raw_data(project_name, columns).iloc[start:stop]
+        if columns is not None:
+            data = data[columns]
+    data.index = pd.RangeIndex(start, start + len(data))
+    return data
+
+
+def count_rows(path, columns=None):
+    """
+    Counts the rows of a raw or split data file. Splits are counted without
+    loading their rows.
+
+    Parameters:
+    - path (str): Path to the data file.
+    - columns (list[str]): Columns to load the raw data with, so that it is
+        cached for later `load_rows` calls with the same columns.
+
+    Returns:
+    - int: The number of rows.
+    """
+    if is_split_path(path):
+        return len(np.load(path, mmap_mode="r"))
+    return len(load_raw_data(get_project_name("raw", path), columns))
+
+
+def data_hash(path):
+    """
+    Get the content hash of the data loaded from a file. The hash of a split covers
+    the project's raw data too, since its rows are read from there.
+
+    Parameters:
+    - path (str): Path to the data file.
+
+    Returns:
+    - str: SHA-1 hex digest(s) of the file's contents.
+    """
+    if is_split_path(path):
+        _, project_name = get_split_details(path)
+        return file_hash(path) + file_hash(get_file_path("raw", project_name))
+    return file_hash(path)
+
+
+def write_data(data, path):
+    """
+    Writes data to the specified file path.
+
+    Parameters:
+    - data (pd.DataFrame): The Pandas DataFrame to be saved.
+    - path (str): The file path to the data file. The storage format is picked
+        from its extension (see `storage.py`).
+    """
+    get_storage(path).save(data, path)
+
+
 def save_data(data, datatype, project_name, sdg):
     """
     Saves the given data to the specified file path.
@@ -63,16 +268,19 @@ def save_data(data, datatype, project_name, sdg):
     - path (str): The file path where the data will be saved.
     """
     path = get_file_path(datatype, project_name, sdg)
-    data.to_json(path, orient="records", lines=True)
+    write_data(data, path)
 
 
 @check_datatype_decorator
-def iterdatatype_data(datatype: str, sdg: str) -> tuple[str, pd.DataFrame]:
+def iterdatatype_data(
+    datatype: str, sdg: str, columns: list[str] = None
+) -> tuple[str, pd.DataFrame]:
     """
     Iterates over JSON files based on the specified datatype.
 
     Parameters:
     - datatype (str): The type of data to iterate over, which should be one of the keys in PROJECTNAME_DATA_PATHS.
+    - columns (list[str]): Only load these columns. Loads all columns by default.
 
     Options in PROJECTNAME_DATA_PATHS:
     - 'raw': Raw data files in the 'data/raw/' directory with a '*.json' extension.
@@ -98,10 +306,58 @@ def iterdatatype_data(datatype: str, sdg: str) -> tuple[str, pd.DataFrame]:
     query = PROJECTNAME_DATA_PATHS[datatype](sdg=sdg)
     for path in glob(query):
         project_name = get_project_name(datatype, path)
-        data = load_data(path)
+        data = load_data(path, columns=columns)
         yield project_name, data
 
 
+@check_datatype_decorator
+def get_datatype_paths(datatype: str, sdg: str) -> dict:
+    """
+    Finds the data files of a datatype for an SDG, without loading them.
+
+    Parameters:
+    - datatype (str): One of the keys in PROJECTNAME_DATA_PATHS.
+    - sdg (str): The SDG of the files.
+
+    Returns:
+    - dict: Maps each project name to the path of its data file.
+    """
+    paths = sorted(glob(PROJECTNAME_DATA_PATHS[datatype](sdg=sdg)))
+    return {get_project_name(datatype, path): path for path in paths}
+
+
+@check_datatype_decorator
+def iterdatatype_project_data(
+    datatype: str, sdgs: list[str], columns: list[str] = None
+):
+    """
+    Iterates over projects, yielding the data of every SDG for a project at once.
+
+    Files shared between SDGs (e.g. 'raw' files) are only loaded once.
+
+    Parameters:
+    - datatype (str): The type of data to iterate over, which should be one of the keys in PROJECTNAME_DATA_PATHS.
+    - sdgs (list[str]): The SDGs to load data for.
+    - columns (list[str]): Only load these columns. Loads all columns by default.
+
+    Returns:
+    - Generator: Yields a tuple containing the project name and a dict mapping each SDG
+        to its Pandas DataFrame.
+    """
+    project_paths = {}
+    for sdg in sdgs:
+        for path in glob(PROJECTNAME_DATA_PATHS[datatype](sdg=sdg)):
+            project_name = get_project_name(datatype, path)
+            project_paths.setdefault(project_name, {})[sdg] = path
+
+    for project_name, sdg_paths in project_paths.items():
+        loaded_data = {}
+        for path in sdg_paths.values():
+            if path not in loaded_data:
+                loaded_data[path] = load_data(path, columns=columns)
+        yield project_name, {sdg: loaded_data[path] for sdg, path in sdg_paths.items()}
+
+
 @check_datatype_decorator
 def get_project_name(datatype: str, path: str) -> str:
     """
@@ -115,7 +371,7 @@ def get_project_name(datatype: str, path: str) -> str:
     - str: The extracted project name.
     """
     base_name = os.path.basename(path)
-    project_name = base_name.replace(f"__{datatype}", "").replace(".jsonl", "")
+    project_name = os.path.splitext(base_name)[0].replace(f"__{datatype}", "")
     if "SDG " in project_name:
         project_sdg, project_name = project_name.split("_", maxsplit=1)
 
@@ -190,14 +446,97 @@ def get_doccano_export_paths():
     - Generator: Yields a tuple containing the project name and corresponding list of Pandas
         DataFrames for each directory
     """
-    project_paths = glob(DOCCANO_EXPORT_DIRS)
+    for project_name in get_doccano_export_projects():
+        yield project_name, load_doccano_export(project_name)
+
+
+def get_doccano_export_projects():
+    """
+    Gets the names of the projects available in doccano_export.
+
+    Returns:
+    - list: The sorted project names, one per directory.
+    """
+    return sorted(os.path.basename(path) for path in glob(DOCCANO_EXPORT_DIRS))
+
+
+def load_doccano_export(project_name, columns=None):
+    """
+    Loads the doccano exports of a project.
 
-    for project_path in project_paths:
-        project_name = os.path.basename(project_path)
+    Parameters:
+    - project_name (str): The name of the project.
+    - columns (list[str]): Only keep these columns. Keeps all columns by default.
+
+    Returns:
+    - list[pd.DataFrame]: One DataFrame per export file.
+    """
+    dataframe_paths = sorted(glob(DOCCANO_EXPORT_FILES(project_name)))
+    return [load_data(path, columns=columns) for path in dataframe_paths]
 
-        dataframe_paths = glob(DOCCANO_EXPORT_FILES(project_name))
-        dataframes = [load_data(path) for path in dataframe_paths]
-        yield project_name, dataframes
+
+def iter_doccano_export(project_name, chunksize, columns=None):
+    """
+    Reads the doccano exports of a project in chunks, so that only one chunk is held
+    in memory at a time.
+
+    Parameters:
+    - project_name (str): The name of the project.
+    - chunksize (int): Number of outlines per chunk.
+    - columns (list[str]): Only keep these columns. Keeps all columns by default.
+
+    Returns:
+    - Generator: Yields a DataFrame of at most `chunksize` outlines at a time,
+        indexed from 0, going through the export files in order.
+    """
+    for path in sorted(glob(DOCCANO_EXPORT_FILES(project_name))):
+        yield from get_storage(path).iter_chunks(path, chunksize, columns=columns)
+
+
+def concat_data(paths, path):
+    """
+    Combines data files of the same format into one file, without parsing their rows
+    into DataFrames.
+
+    Parameters:
+    - paths (list[str]): The files to combine, in order.
+    - path (str): The file to write.
+    """
+    get_storage(path).concat(paths, path)
+
+
+def open_data_writer(path, json_columns=None):
+    """
+    Opens a file to write data to in chunks (see `storage.py`).
+
+    Parameters:
+    - path (str): The file path to the data file.
+    - json_columns (list[str]): Columns of lists or dicts, which Parquet files store
+        as JSON strings even if a chunk doesn't show it.
+
+    Returns:
+    - JsonlWriter or ParquetWriter: A writer with `write(data)` and `close()`,
+        usable as a context manager.
+    """
+    return get_storage(path).open_writer(path, json_columns)
+
+
+def doccano_export_hash(project_name):
+    """
+    Get a fingerprint of a project's doccano exports, which changes when an export
+    file is added, removed, renamed or modified.
+
+    Parameters:
+    - project_name (str): The name of the project.
+
+    Returns:
+    - str: SHA-1 hex digest over the names and content hashes of the export files.
+    """
+    sha1 = hashlib.sha1()
+    for path in sorted(glob(DOCCANO_EXPORT_FILES(project_name))):
+        sha1.update(os.path.basename(path).encode())
+        sha1.update(file_hash(path).encode())
+    return sha1.hexdigest()
 
 
 def prepare_dirs():
@@ -0,0 +1,207 @@
+import cProfile
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+sys.path.append("./scripts")
+from variables import METRICS_PATH, PROFILES_DIR
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows, where memory and child CPU time aren't recorded
+    resource = None
+
+# Environment variables, read when a stage starts so that worker processes follow
+# them too: the metrics file ("" to not record metrics), the stages to profile
+# (comma-separated names, or "all") and the profiler ("cprofile" or "pyinstrument")
+METRICS_PATH_ENV = "SDG_METRICS_PATH"
+PROFILE_ENV = "SDG_PROFILE"
+PROFILER_ENV = "SDG_PROFILER"
+
+# Stages running in each thread, innermost last
+RUNNING_STAGES = threading.local()
+
+
+def get_running_stages():
+    if not hasattr(RUNNING_STAGES, "stack"):
+        RUNNING_STAGES.stack = []
+    return RUNNING_STAGES.stack
+
+
+def peak_rss():
+    """
+    Get the peak resident set size of this process so far.
+
+    Returns:
+    - int: Peak RSS in bytes, or None if it can't be measured.
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Reported in bytes on macOS and in kilobytes elsewhere
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def child_cpu_time():
+    """Get the CPU time of the finished child processes (e.g. process pool workers)."""
+    if resource is None:
+        return 0.0
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+def write_metrics(record):
+    """
+    Append a record to the metrics file, see `METRICS_PATH_ENV`.
+
+    Parameters:
+    - record (dict): The metrics of a stage.
+    """
+    path = os.environ.get(METRICS_PATH_ENV, METRICS_PATH)
+    if not path:
+        return
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    # A single append per record, so that records of concurrent processes don't mix
+    with open(path, "a") as file:
+        file.write(json.dumps(record, default=str) + "\n")
+
+
+def start_profiler(name):
+    """
+    Start profiling a stage if it is selected by the `PROFILE_ENV` variable.
+
+    Parameters:
+    - name (str): Name of the stage.
+
+    Returns:
+    - The running cProfile or pyinstrument profiler, or None.
+    """
+    selected = {stage.strip() for stage in os.environ.get(PROFILE_ENV, "").split(",")}
+    if name not in selected and "all" not in selected:
+        return None
+
+    if os.environ.get(PROFILER_ENV, "cprofile") == "pyinstrument":
+        import pyinstrument
+
+        profiler = pyinstrument.Profiler()
+        profiler.start()
+    else:
+        profiler = cProfile.Profile()
+        profiler.enable()
+    return profiler
+
+
+def stop_profiler(profiler, name):
+    """
+    Stop a profiler and save its profile to PROFILES_DIR, as a cProfile stats file
+    (e.g. for `python -m pstats` or snakeviz) or a pyinstrument HTML report.
+
+    Returns:
+    - str: Path to the profile.
+    """
+    os.makedirs(PROFILES_DIR, exist_ok=True)
+    base_path = os.path.join(PROFILES_DIR, f"{name}-{os.getpid()}-{time.time_ns()}")
+    if isinstance(profiler, cProfile.Profile):
+        profiler.disable()
+        path = f"{base_path}.prof"
+        profiler.dump_stats(path)
+    else:
+        profiler.stop()
+        path = f"{base_path}.html"
+        with open(path, "w") as file:
+            file.write(profiler.output_html())
+    return path
+
+
+@contextmanager
+def stage(name, rows=None, **details):
+    """
+    Measure a pipeline stage and append its metrics to the metrics file.
+
+    The record holds the stage's wall and CPU time in seconds (CPU time of this
+    process, and of the child processes that finished during the stage), its rows
+    and rows per second, the peak RSS of the process, whether it raised, and the
+    totals of the model hooks (see `hook`) called while it was the innermost
+    running stage. Stages selected with `PROFILE_ENV` are also profiled, unless
+    an outer stage already is.
+
+    Parameters:
+    - name (str): Name of the stage.
+    - rows (int): Number of rows the stage processes, if known up front.
+    - details: Other values to record, e.g. the SDG and model name.
+
+    Yields:
+    - dict: The stage's record. Set its "rows" once they are known.
+
+    Example:
+    >>> with stage("predict_models", datatype="test") as record:
+    ...     record["rows"] = predict(...)
+    """
+    record = dict(stage=name, **details, rows=rows)
+    stack = get_running_stages()
+    profiling = any(running["profiler"] is not None for running in stack)
+    running = dict(hooks={}, profiler=None if profiling else start_profiler(name))
+    stack.append(running)
+
+    started = time.time()
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    child_cpu_start = child_cpu_time()
+    status = "error"
+    try:
+        yield record
+        status = "ok"
+    finally:
+        wall_seconds = time.perf_counter() - wall_start
+        cpu_seconds = time.process_time() - cpu_start
+        child_cpu_seconds = child_cpu_time() - child_cpu_start
+        stack.pop()
+        if running["profiler"] is not None:
+            record["profile"] = stop_profiler(running["profiler"], name)
+
+        rows = record["rows"]
+        record.update(
+            status=status,
+            started=started,
+            wall_seconds=wall_seconds,
+            cpu_seconds=cpu_seconds,
+            child_cpu_seconds=child_cpu_seconds,
+            rows_per_second=rows / wall_seconds if rows and wall_seconds > 0 else None,
+            peak_rss_bytes=peak_rss(),
+            pid=os.getpid(),
+            hooks=running["hooks"],
+        )
+        write_metrics(record)
+
+
+@contextmanager
+def hook(name, rows=1):
+    """
+    Time a call of a model hook (e.g. `train_ml_model`), adding it to the totals
+    of the innermost running stage. Does nothing outside of a stage.
+
+    Parameters:
+    - name (str): Name of the hook.
+    - rows (int): Number of texts the call processes.
+    """
+    stack = get_running_stages()
+    if len(stack) == 0:
+        yield
+        return
+
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    try:
+        yield
+    finally:
+        totals = stack[-1]["hooks"].setdefault(
+            name, dict(calls=0, rows=0, wall_seconds=0.0, cpu_seconds=0.0)
+        )
+        totals["calls"] += 1
+        totals["rows"] += rows
+        totals["wall_seconds"] += time.perf_counter() - wall_start
+        totals["cpu_seconds"] += time.process_time() - cpu_start
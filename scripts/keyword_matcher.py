@@ -0,0 +1,133 @@
+import re
+
+
+class KeywordMatcher:
+    """
+    Finds every keyword of a dictionary in a text with a single scan.
+
+    Keywords are regular expression fragments matched at the start of a word, i.e.
+    a keyword matches wherever `re.search(rf"\\b{keyword}", text)` would. The text is
+    scanned once for word boundaries where any keyword can start, and only the
+    keywords sharing the first character at those positions are checked.
+    """
+
+    def __init__(self, keywords):
+        """
+        Parameters:
+            - keywords (list[str]): Keyword patterns, e.g. "poverty" or "agricultur*".
+        """
+        self.keywords = list(keywords)
+        unique_keywords = list(dict.fromkeys(self.keywords))
+
+        # Keywords grouped by their first character. Keywords that don't start with
+        # a plain, required character are checked at every candidate position.
+        self.candidates = {}
+        self.fallback_candidates = []
+        for keyword in unique_keywords:
+            pattern = re.compile(keyword)
+            if is_plain_start(keyword):
+                self.candidates.setdefault(keyword[0], []).append((keyword, pattern))
+            else:
+                self.fallback_candidates.append((keyword, pattern))
+
+        if len(unique_keywords) == 0:
+            self.scanner = None
+            return
+
+        alternatives = "|".join(f"(?:{keyword})" for keyword in unique_keywords)
+        if len(self.fallback_candidates) == 0:
+            first_chars = re.escape("".join(sorted(self.candidates)))
+            self.scanner = re.compile(rf"\b(?=[{first_chars}])(?=(?:{alternatives}))")
+        else:
+            self.scanner = re.compile(rf"\b(?=(?:{alternatives}))")
+
+    def find_spans(self, text):
+        """
+        Find every keyword occurrence in a text.
+
+        Parameters:
+            - text (str): The text to search.
+
+        Returns:
+            - list[list]: [start, end, keyword] for each match, ordered by start.
+        """
+        spans = []
+        if self.scanner is None:
+            return spans
+
+        for position in self.scanner.finditer(text):
+            start = position.start()
+            candidates = self.candidates.get(text[start], []) + self.fallback_candidates
+            for keyword, pattern in candidates:
+                match = pattern.match(text, start)
+                if match:
+                    spans.append([start, match.end(), keyword])
+        return spans
+
+    def match(self, text):
+        """
+        Find the keywords present in a text.
+
+        Parameters:
+            - text (str): The text to search.
+
+        Returns:
+            - tuple: The matched keywords, in dictionary order, and their spans
+                (see `find_spans`).
+        """
+        spans = self.find_spans(text)
+        found = {keyword for _, _, keyword in spans}
+        keyword_matches = [keyword for keyword in self.keywords if keyword in found]
+        return keyword_matches, spans
+
+
+class MultiSDGKeywordMatcher:
+    """
+    Finds the keywords of every SDG in a text with a single scan.
+
+    One KeywordMatcher is built over the keywords of all SDGs, and each match is
+    attributed to every SDG whose dictionary contains the keyword.
+    """
+
+    def __init__(self, dictionary):
+        """
+        Parameters:
+            - dictionary (dict): Maps each SDG to its list of keyword patterns.
+        """
+        self.dictionary = {sdg: list(keywords) for sdg, keywords in dictionary.items()}
+        self.sdg_keywords = {
+            sdg: set(keywords) for sdg, keywords in self.dictionary.items()
+        }
+        all_keywords = [k for keywords in self.dictionary.values() for k in keywords]
+        self.matcher = KeywordMatcher(all_keywords)
+
+    def match(self, text):
+        """
+        Find the keywords of every SDG present in a text.
+
+        Parameters:
+            - text (str): The text to search.
+
+        Returns:
+            - dict: Maps each SDG to its matched keywords, in dictionary order, and
+                their spans (see `KeywordMatcher.find_spans`).
+        """
+        spans = self.matcher.find_spans(text)
+        found = {keyword for _, _, keyword in spans}
+
+        results = {}
+        for sdg, keywords in self.dictionary.items():
+            sdg_keywords = self.sdg_keywords[sdg]
+            keyword_matches = [keyword for keyword in keywords if keyword in found]
+            sdg_spans = [span for span in spans if span[2] in sdg_keywords]
+            results[sdg] = (keyword_matches, sdg_spans)
+        return results
+
+
+def is_plain_start(keyword):
+    """Check that every match of a keyword pattern starts with its first character."""
+    return (
+        keyword[:1].isalnum()
+        and keyword[1:2] not in ("*", "?", "{")
+        and "|" not in keyword
+    )
@@ -0,0 +1,62 @@
+import json
+import os
+import sys
+import pandas as pd
+
+sys.path.append("./scripts")
+from variables import UOFT_KEYWORDS_PATH, KEYWORDS_CACHE_DIR
+from file_org import file_hash
+
+# Parsed keyword dictionaries of this process, keyed by the file's content hash
+KEYWORD_DICTS = {}
+
+
+def parse_keywords(path):
+    """
+    Parse a keyword spreadsheet with "SDG" and comma separated "Keywords" columns.
+
+    Parameters:
+    - path (str): Path to the spreadsheet.
+
+    Returns:
+    - dict: Maps each SDG to its list of keywords.
+    """
+    df = pd.read_excel(path)
+    df["Keywords"] = df["Keywords"].apply(lambda s: [t.strip() for t in s.split(",")])
+    return dict(zip(df["SDG"], df["Keywords"]))
+
+
+def load_keywords(path=UOFT_KEYWORDS_PATH, cache_dir=None):
+    """
+    Load a keyword dictionary, parsing the spreadsheet only when it has changed.
+
+    The parsed dictionary is kept in memory for the rest of the process and cached
+    on disk as JSON, keyed by the spreadsheet's content hash.
+
+    Parameters:
+    - path (str): Path to the spreadsheet.
+    - cache_dir (str): Directory of the on-disk cache. Defaults to the module's
+        `KEYWORDS_CACHE_DIR`, read at call time so that it can be patched.
+
+    Returns:
+    - dict: Maps each SDG to its list of keywords.
+    """
+    key = file_hash(path)
+    if key in KEYWORD_DICTS:
+        return KEYWORD_DICTS[key]
+
+    if cache_dir is None:
+        cache_dir = KEYWORDS_CACHE_DIR
+    file_name = os.path.splitext(os.path.basename(path))[0]
+    cache_path = os.path.join(cache_dir, f"{file_name}-{key}.json")
+    if os.path.exists(cache_path):
+        with open(cache_path) as file:
+            keywords = json.load(file)
+    else:
+        keywords = parse_keywords(path)
+        os.makedirs(cache_dir, exist_ok=True)
+        with open(cache_path, "w") as file:
+            json.dump(keywords, file)
+
+    KEYWORD_DICTS[key] = keywords
+    return keywords
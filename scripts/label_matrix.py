@@ -0,0 +1,77 @@
+import sys
+
+sys.path.append("./scripts")
+import numpy as np
+import pandas as pd
+from variables import SDG_MAP
+
+# Column of each SDG in a label matrix, and its bit in "label_bits"
+SDGS = list(SDG_MAP)
+SDG_INDEX = {sdg: i for i, sdg in enumerate(SDGS)}
+SDG_BITS = np.left_shift(1, np.arange(len(SDGS))).astype(np.uint16)
+
+
+def encode_labels(labels):
+    """
+    Encode lists of SDG labels as a boolean matrix with one column per SDG.
+
+    Parameters:
+    - labels (pd.Series): A list of SDGs (e.g. "SDG 1") for each row.
+
+    Returns:
+    - np.ndarray: A (rows, SDGs) boolean matrix, with columns in SDG_MAP order.
+    """
+    exploded = pd.Series(labels).reset_index(drop=True).explode().dropna()
+    matrix = np.zeros((len(labels), len(SDGS)), dtype=bool)
+    matrix[exploded.index.to_numpy(), sdg_columns(exploded)] = True
+    return matrix
+
+
+def sdg_columns(sdgs):
+    """
+    Get the label matrix column of each SDG.
+
+    Raises:
+    - KeyError: If an SDG isn't in SDG_MAP.
+    """
+    columns = pd.Series(sdgs).map(SDG_INDEX)
+    unknown = columns.isna()
+    if unknown.any():
+        raise KeyError(pd.Series(sdgs)[unknown.to_numpy()].iloc[0])
+    return columns.to_numpy(dtype=int)
+
+
+def decode_labels(matrix):
+    """
+    Decode a label matrix into lists of SDG labels, ordered as in SDG_MAP.
+
+    Parameters:
+    - matrix (np.ndarray): A (rows, SDGs) boolean matrix.
+
+    Returns:
+    - list[list[str]]: The SDGs of each row.
+    """
+    rows, columns = np.nonzero(matrix)
+    sdgs = np.array(SDGS, dtype=object)[columns].tolist()
+    bounds = np.searchsorted(rows, np.arange(len(matrix) + 1)).tolist()
+    return [sdgs[start:end] for start, end in zip(bounds[:-1], bounds[1:])]
+
+
+def pack_labels(matrix):
+    """Pack a label matrix into one 16-bit integer per row, one bit per SDG."""
+    return np.bitwise_or.reduce(matrix * SDG_BITS, axis=1).astype(np.uint16)
+
+
+def sdg_label(label_bits, sdg):
+    """
+    Get the 1/0 labels of an SDG from packed labels.
+
+    Parameters:
+    - label_bits (array-like): Packed labels (see `pack_labels`).
+    - sdg (str): The SDG, e.g. "SDG 1".
+
+    Returns:
+    - np.ndarray: 1 where a row is labelled with the SDG, 0 otherwise.
+    """
+    label_bits = np.asarray(label_bits, dtype=np.uint16)
+    return ((label_bits >> SDG_INDEX[sdg]) & 1).astype(int)
@@ -0,0 +1,178 @@
+import importlib
+import json
+import os
+import shutil
+import sys
+
+sys.path.append("./scripts")
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import FunctionTransformer
+from file_org import file_hash
+from multi_sdg import check_pipeline
+
+# Model artifacts are directories holding the fitted arrays of a tf-idf + logistic
+# regression model as .npy files, described by a small JSON manifest
+ARTIFACT_FORMAT = "tfidf_logistic_regression"
+ARTIFACT_VERSION = 1
+MANIFEST_FILENAME = "manifest.json"
+
+# Pipeline steps an artifact can be made from. Samplers only act while fitting,
+# so they are left out of the artifact.
+SUPPORTED_STEPS = {"preprocessor", "tfidf", "sampler", "classifier"}
+
+
+def save_artifact(model, model_name, path):
+    """
+    Save a trained model as a model artifact.
+
+    The vectorizer vocabulary, idf weights and classifier coefficients are saved as
+    .npy arrays, which `load_artifact` memory-maps, and everything else needed to
+    rebuild the model goes in the manifest.
+
+    Parameters:
+    - model (TextAnalyticsModel): A trained "ml" model whose pipeline has "tfidf"
+        and "classifier" steps.
+    - model_name (str): Name of the module in `models/` the model comes from.
+    - path (str): Directory to save the artifact to. Replaced if it exists.
+
+    Raises:
+    - ValueError: If the model can't be saved as an artifact.
+    """
+    if model.model_type != "ml":
+        raise ValueError(f"{model.sdg} {model_name} is not an 'ml' model.")
+    check_pipeline(model.sdg, model.model)
+    steps = [name for name, _ in model.model.steps]
+    unsupported_steps = set(steps) - SUPPORTED_STEPS
+    if unsupported_steps:
+        raise ValueError(f"Unsupported pipeline steps: {sorted(unsupported_steps)}.")
+
+    vectorizer = model.model.named_steps["tfidf"]
+    classifier = model.model.named_steps["classifier"]
+    terms = sorted(vectorizer.vocabulary_, key=vectorizer.vocabulary_.get)
+    arrays = dict(
+        vocabulary=np.array(terms, dtype=str),
+        idf=np.asarray(vectorizer.idf_, dtype=np.float64),
+        coef=np.asarray(classifier.coef_[0], dtype=np.float64),
+    )
+    manifest = dict(
+        format=ARTIFACT_FORMAT,
+        version=ARTIFACT_VERSION,
+        sdg=model.sdg,
+        model_name=model_name,
+        preprocessor="preprocessor" in steps,
+        vectorizer=get_json_params(vectorizer),
+        classifier=get_json_params(classifier),
+        intercept=float(classifier.intercept_[0]),
+        classes=[int(label) for label in classifier.classes_],
+        arrays={},
+    )
+
+    # Written next to the artifact first, so a crash never leaves half an artifact
+    tmp_path = f"{path}.tmp"
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+    for name, array in arrays.items():
+        array_path = os.path.join(tmp_path, f"{name}.npy")
+        np.save(array_path, array)
+        manifest["arrays"][name] = dict(file=f"{name}.npy", sha1=file_hash(array_path))
+    with open(os.path.join(tmp_path, MANIFEST_FILENAME), "w") as file:
+        json.dump(manifest, file, indent=1)
+
+    shutil.rmtree(path, ignore_errors=True)
+    os.replace(tmp_path, path)
+
+
+def load_artifact(path, mmap_mode="r"):
+    """
+    Load a model saved with `save_artifact`.
+
+    Parameters:
+    - path (str): The artifact directory.
+    - mmap_mode (str): Passed to `np.load`. By default the arrays are memory-mapped
+        read-only, so processes loading the same artifact share its pages.
+
+    Returns:
+    - TextAnalyticsModel: The model, with a pipeline equivalent to the trained one.
+
+    Raises:
+    - ValueError: If the artifact has an unknown format or version.
+    """
+    manifest = load_manifest(path)
+    if (manifest.get("format"), manifest.get("version")) != (
+        ARTIFACT_FORMAT,
+        ARTIFACT_VERSION,
+    ):
+        raise ValueError(f"Unsupported model artifact: {path}.")
+
+    arrays = {
+        name: np.load(os.path.join(path, entry["file"]), mmap_mode=mmap_mode)
+        for name, entry in manifest["arrays"].items()
+    }
+
+    vectorizer_params = dict(manifest["vectorizer"])
+    vectorizer_params["dtype"] = np.dtype(vectorizer_params["dtype"]).type
+    vectorizer_params["ngram_range"] = tuple(vectorizer_params["ngram_range"])
+    vectorizer = TfidfVectorizer(**vectorizer_params)
+    vectorizer.vocabulary_ = {
+        term: i for i, term in enumerate(arrays["vocabulary"].tolist())
+    }
+    vectorizer.idf_ = arrays["idf"]
+
+    classifier = LogisticRegression(**manifest["classifier"])
+    classifier.classes_ = np.array(manifest["classes"])
+    classifier.coef_ = arrays["coef"].reshape(1, -1)
+    classifier.intercept_ = np.array([manifest["intercept"]])
+    classifier.n_features_in_ = classifier.coef_.shape[1]
+
+    module = importlib.import_module(f"models.{manifest['model_name']}")
+    model = module.TextAnalyticsModel(manifest["sdg"])
+    steps = [("tfidf", vectorizer), ("classifier", classifier)]
+    if manifest["preprocessor"]:
+        steps.insert(0, ("preprocessor", FunctionTransformer(model.preprocess_text)))
+    model.model = Pipeline(steps)
+    return model
+
+
+def load_manifest(path):
+    """Load the manifest of a model artifact."""
+    with open(os.path.join(path, MANIFEST_FILENAME)) as file:
+        return json.load(file)
+
+
+def is_artifact(path):
+    """Check if a path is a model artifact directory."""
+    return os.path.isfile(os.path.join(path, MANIFEST_FILENAME))
+
+
+def artifact_hash(path):
+    """
+    Get the content hash of a model artifact. The manifest records the hash of
+    every array, so hashing it covers the whole artifact.
+    """
+    return file_hash(os.path.join(path, MANIFEST_FILENAME))
+
+
+def get_json_params(estimator):
+    """
+    Get the parameters of an estimator in a form that can be saved as JSON.
+
+    Raises:
+    - ValueError: If a parameter (e.g. a custom tokenizer) can't be saved as JSON.
+    """
+    params = {}
+    for name, value in estimator.get_params(deep=False).items():
+        if name == "dtype":
+            value = np.dtype(value).name
+        elif isinstance(value, tuple):
+            value = list(value)
+        try:
+            json.dumps(value)
+        except TypeError:
+            raise ValueError(
+                f"{type(estimator).__name__} parameter '{name}' can't be saved."
+            )
+        params[name] = value
+    return params
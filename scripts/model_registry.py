@@ -0,0 +1,190 @@
+import os
+import sys
+
+sys.path.append("./scripts")
+import importlib
+from collections import OrderedDict
+from glob import glob
+import dill
+from variables import (
+    MODEL_TEMPLATE,
+    ARTIFACT_TEMPLATE,
+    GET_MODEL_DETAILS,
+    MODEL_CACHE_BYTES_LIMIT,
+)
+from file_org import file_hash
+from model_artifacts import load_artifact, is_artifact, artifact_hash
+
+# Directory of the model modules, see `models/template.py`
+MODELS_DIR = os.path.join(os.path.dirname(__file__), "..", "models")
+
+
+def load_model(file_path):
+    """
+    Load the TextAnalyticsModel instance from a file.
+
+    Parameters:
+    - file_path (str): File path to load the model from, either a model artifact
+        directory (see `model_artifacts.py`) or a dill file.
+
+    Returns:
+    - TextAnalyticsModel: Loaded model instance.
+    """
+    if is_artifact(file_path):
+        return load_artifact(file_path)
+
+    with open(file_path, "rb") as file:
+        loaded_model = dill.load(file)
+
+    return loaded_model
+
+
+def get_model_names():
+    """Get the names of the model modules in `models/`, without importing them."""
+    return [
+        os.path.splitext(filename)[0]
+        for filename in os.listdir(MODELS_DIR)
+        if filename.endswith(".py") and not filename.startswith("__")
+    ]
+
+
+def get_model_paths():
+    """
+    Find the saved models. Model artifacts are used over dill files of the same model.
+
+    Returns:
+    - dict: Maps each (sdg, model_name) pair to the path of its saved model.
+    """
+    model_paths = {}
+    artifact_paths = [path for path in glob(ARTIFACT_TEMPLATE()) if is_artifact(path)]
+    for model_path in sorted(glob(MODEL_TEMPLATE())) + sorted(artifact_paths):
+        sdg, model_name = GET_MODEL_DETAILS(os.path.basename(model_path))
+        model_paths[(sdg, model_name)] = model_path
+    return model_paths
+
+
+def get_model_path(sdg, model_name):
+    """Get the path of a saved model, preferring its model artifact."""
+    artifact_path = ARTIFACT_TEMPLATE(sdg, model_name)
+    if is_artifact(artifact_path):
+        return artifact_path
+    return MODEL_TEMPLATE(sdg, model_name)
+
+
+def model_hash(model_path):
+    """Get the content hash of a saved model."""
+    if is_artifact(model_path):
+        return artifact_hash(model_path)
+    return file_hash(model_path)
+
+
+def model_size(model_path):
+    """Get the size of a saved model's files, used to estimate its memory use."""
+    if os.path.isdir(model_path):
+        return sum(
+            os.path.getsize(os.path.join(model_path, filename))
+            for filename in os.listdir(model_path)
+        )
+    return os.path.getsize(model_path)
+
+
+class ModelRegistry:
+    """
+    Index of the model modules and saved models, built from their filenames alone.
+
+    Modules are imported and saved models loaded the first time they are used.
+    Loaded models are kept in a least recently used cache, and the least recently
+    used ones are dropped once the cache holds more than `max_bytes` (estimated from
+    the size of the models' files, see `model_size`).
+    """
+
+    def __init__(self, max_bytes=MODEL_CACHE_BYTES_LIMIT, prediction_cache=None):
+        """
+        Parameters:
+            - max_bytes (int): Memory cap of the loaded models. None for no cap.
+            - prediction_cache (PredictionCache): Cache the loaded models look up
+                and save their predictions in (see
+                `TextAnalyticsFunctions.use_prediction_cache`). None for no cache.
+        """
+        self.max_bytes = max_bytes
+        self.prediction_cache = prediction_cache
+        self.modules = {}
+        self.loaded_models = OrderedDict()
+        self.loaded_bytes = 0
+        self.refresh()
+
+    def refresh(self):
+        """Index the model modules and saved models again, e.g. after training."""
+        self.model_names = get_model_names()
+        self.model_paths = get_model_paths()
+
+    def saved_models(self, ignore_models=()):
+        """
+        Get the saved models, without loading them.
+
+        Parameters:
+            - ignore_models (list[str]): Model names to leave out.
+
+        Returns:
+            - list[tuple]: The (sdg, model_name) pair of each saved model.
+        """
+        return [
+            (sdg, model_name)
+            for sdg, model_name in self.model_paths
+            if model_name not in ignore_models
+        ]
+
+    def get_module(self, model_name):
+        """Import the module of a model from `models/`."""
+        if model_name not in self.modules:
+            self.modules[model_name] = importlib.import_module(f"models.{model_name}")
+        return self.modules[model_name]
+
+    def get_model_class(self, model_name):
+        """Get the TextAnalyticsModel class of a model, or None if it has none."""
+        return getattr(self.get_module(model_name), "TextAnalyticsModel", None)
+
+    def get_multi_sdg_model(self, model_name):
+        """Get the MultiSDGModel class of a model, or None if it has none."""
+        return getattr(self.get_module(model_name), "MultiSDGModel", None)
+
+    def get_model(self, sdg, model_name):
+        """
+        Get a saved model, loading it if it isn't in the cache.
+
+        Parameters:
+            - sdg (str): The SDG of the model.
+            - model_name (str): Name of the module in `models/`.
+
+        Returns:
+            - TextAnalyticsModel: The loaded model.
+
+        Raises:
+            - KeyError: If the model hasn't been saved.
+        """
+        key = (sdg, model_name)
+        if key in self.loaded_models:
+            self.loaded_models.move_to_end(key)
+            return self.loaded_models[key][0]
+
+        model_path = self.model_paths[key]
+        model_instance = load_model(model_path)
+        if self.prediction_cache is not None:
+            model_instance.use_prediction_cache(
+                self.prediction_cache, model_hash(model_path)
+            )
+        size = model_size(model_path)
+        self.loaded_models[key] = (model_instance, size)
+        self.loaded_bytes += size
+        self.evict()
+        return model_instance
+
+    def evict(self):
+        """Drop the least recently used models until the cache is under its cap."""
+        while (
+            self.max_bytes is not None
+            and self.loaded_bytes > self.max_bytes
+            and len(self.loaded_models) > 1
+        ):
+            _, (_, size) = self.loaded_models.popitem(last=False)
+            self.loaded_bytes -= size
@@ -0,0 +1,228 @@
+import numpy as np
+from scipy.special import expit
+from sklearn.feature_extraction.text import CountVectorizer
+
+# TfidfVectorizer parameters that change how a document is turned into term counts.
+# These have to match across SDG models for them to share one feature matrix.
+SHARED_VECTORIZER_PARAMS = [
+    "input",
+    "encoding",
+    "decode_error",
+    "strip_accents",
+    "lowercase",
+    "preprocessor",
+    "tokenizer",
+    "stop_words",
+    "token_pattern",
+    "analyzer",
+    "binary",
+    "dtype",
+]
+
+
+class SeparateSDGPredictor:
+    """
+    Fallback multi-SDG predictor that scores each SDG model on its own.
+    """
+
+    def __init__(self, models):
+        """
+        Parameters:
+            - models (dict): Maps each SDG to its trained TextAnalyticsModel.
+        """
+        self.models = models
+
+    def predict_batch(self, texts):
+        """
+        Generate predictions for every SDG.
+
+        Parameters:
+            - texts (list[str]): Texts to score.
+
+        Returns:
+            - dict: Maps each SDG to a list of prediction dicts (see
+                `TextAnalyticsFunctions.predict`), one per text.
+        """
+        return {sdg: model.predict_batch(texts) for sdg, model in self.models.items()}
+
+
+class MultiSDGPredictor:
+    """
+    Scores the logistic regression pipelines of every SDG in a single pass.
+
+    Each text is preprocessed and counted once against the union of all SDG
+    vocabularies. The TF-IDF weighting, L2 normalisation and classifier
+    coefficients of all SDGs are folded into two (n_terms, n_sdgs) matrices, so
+    scoring a batch is two sparse-dense matrix products.
+    """
+
+    def __init__(self, models):
+        """
+        Parameters:
+            - models (dict): Maps each SDG to its trained TextAnalyticsModel. All
+                models must be "ml" models whose pipeline ends with "tfidf" and
+                "classifier" steps.
+
+        Raises:
+            - ValueError: If the models can't share a feature matrix.
+        """
+        self.sdgs = list(models)
+        if len(self.sdgs) == 0:
+            raise ValueError("No models to combine.")
+
+        for sdg in self.sdgs:
+            if models[sdg].model_type != "ml":
+                raise ValueError(f"{sdg} is not an 'ml' model.")
+
+        pipelines = [models[sdg].model for sdg in self.sdgs]
+        for sdg, pipeline in zip(self.sdgs, pipelines):
+            check_pipeline(sdg, pipeline)
+
+        self.preprocess_text = get_preprocessor(pipelines)
+        vectorizers = [pipeline.named_steps["tfidf"] for pipeline in pipelines]
+        classifiers = [pipeline.named_steps["classifier"] for pipeline in pipelines]
+
+        shared_params = check_shared_params(vectorizers)
+        vocabulary = sorted(set().union(*(v.vocabulary_ for v in vectorizers)))
+        term_index = {term: i for i, term in enumerate(vocabulary)}
+        ngram_range = (
+            min(v.ngram_range[0] for v in vectorizers),
+            max(v.ngram_range[1] for v in vectorizers),
+        )
+        self.vectorizer = CountVectorizer(
+            vocabulary=vocabulary, ngram_range=ngram_range, **shared_params
+        )
+
+        # Column j of `weights` holds idf * coef of SDG j for every term it knows,
+        # column j of `squared_idf` is used to compute the L2 norm of its tf-idf rows
+        self.weights = np.zeros((len(vocabulary), len(self.sdgs)))
+        self.squared_idf = np.zeros((len(vocabulary), len(self.sdgs)))
+        for j, (vectorizer, classifier) in enumerate(zip(vectorizers, classifiers)):
+            terms = sorted(vectorizer.vocabulary_, key=vectorizer.vocabulary_.get)
+            rows = [term_index[term] for term in terms]
+            self.weights[rows, j] = vectorizer.idf_ * classifier.coef_[0]
+            self.squared_idf[rows, j] = vectorizer.idf_**2
+        self.intercepts = np.array([c.intercept_[0] for c in classifiers])
+
+    def decision_function(self, texts):
+        """
+        Compute the logistic regression decision value of every SDG.
+
+        Parameters:
+            - texts (list[str]): Texts to score.
+
+        Returns:
+            - np.ndarray: Array of shape (len(texts), n_sdgs).
+        """
+        counts = self.vectorizer.transform(self.preprocess_text(texts))
+        norms = np.sqrt(counts.multiply(counts) @ self.squared_idf)
+        norms[norms == 0] = 1
+        return (counts @ self.weights) / norms + self.intercepts
+
+    def predict_batch(self, texts):
+        """
+        Generate predictions for every SDG.
+
+        Parameters:
+            - texts (list[str]): Texts to score.
+
+        Returns:
+            - dict: Maps each SDG to a list of prediction dicts (see
+                `TextAnalyticsFunctions.predict`), one per text.
+        """
+        texts = list(texts)
+        if len(texts) == 0:
+            return {sdg: [] for sdg in self.sdgs}
+
+        decisions = self.decision_function(texts)
+        positive_probs = expit(decisions)
+        # Same tie-breaking as argmax over predict_proba
+        predictions = (positive_probs > 0.5).astype(np.int64)
+        confidences = np.where(predictions == 1, positive_probs, 1 - positive_probs)
+
+        return {
+            sdg: [
+                dict(
+                    category=sdg,
+                    prediction=prediction,
+                    metadata={"confidence": confidence},
+                )
+                for prediction, confidence in zip(predictions[:, j], confidences[:, j])
+            ]
+            for j, sdg in enumerate(self.sdgs)
+        }
+
+
+def get_preprocessor(pipelines):
+    """
+    Get the text preprocessing function of the pipelines, if they have one.
+
+    Raises:
+        - ValueError: If only some of the pipelines have a "preprocessor" step.
+    """
+    has_preprocessor = [
+        "preprocessor" in pipeline.named_steps for pipeline in pipelines
+    ]
+    if not all(has_preprocessor):
+        if any(has_preprocessor):
+            raise ValueError("Only some pipelines have a 'preprocessor' step.")
+        return list
+    return pipelines[0].named_steps["preprocessor"].func
+
+
+def check_pipeline(sdg, pipeline):
+    """
+    Check that a trained pipeline can be folded into a MultiSDGPredictor.
+
+    Raises:
+        - ValueError: If the pipeline is missing a step or isn't a binary classifier.
+    """
+    named_steps = getattr(pipeline, "named_steps", {})
+    for step in ["tfidf", "classifier"]:
+        if step not in named_steps:
+            raise ValueError(f"{sdg} pipeline has no '{step}' step.")
+
+    vectorizer = named_steps["tfidf"]
+    if vectorizer.norm != "l2" or not vectorizer.use_idf or vectorizer.sublinear_tf:
+        raise ValueError(f"{sdg} vectorizer uses unsupported tf-idf weighting.")
+
+    classifier = named_steps["classifier"]
+    if list(getattr(classifier, "classes_", [])) != [0, 1]:
+        raise ValueError(f"{sdg} classifier is not a binary 0/1 classifier.")
+
+
+def check_shared_params(vectorizers):
+    """
+    Check that all vectorizers tokenize text in the same way.
+
+    Returns:
+        - dict: The shared tokenization parameters.
+
+    Raises:
+        - ValueError: If any of the parameters differ between vectorizers.
+    """
+    shared_params = {}
+    for param in SHARED_VECTORIZER_PARAMS:
+        values = [vectorizer.get_params()[param] for vectorizer in vectorizers]
+        if any(value != values[0] for value in values):
+            raise ValueError(f"Vectorizers have different '{param}' values.")
+        shared_params[param] = values[0]
+    return shared_params
+
+
+def build_multi_sdg_predictor(models):
+    """
+    Combine the SDG models of one model type into a single predictor.
+
+    Parameters:
+        - models (dict): Maps each SDG to its trained TextAnalyticsModel.
+
+    Returns:
+        - MultiSDGPredictor if the models can share one feature matrix, otherwise a
+            SeparateSDGPredictor.
+    """
+    try:
+        return MultiSDGPredictor(models)
+    except (ValueError, AttributeError) as error:
+        print(f"Scoring each SDG separately: {error}")
+        return SeparateSDGPredictor(models)
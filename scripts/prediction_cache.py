@@ -0,0 +1,207 @@
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import time
+
+sys.path.append("./scripts")
+from storage import to_json_value
+from variables import PREDICTION_CACHE_PATH, PREDICTION_CACHE_BYTES_LIMIT
+
+# Most values bound in one SQLite statement
+QUERY_BATCH_SIZE = 500
+# Most lookups whose last use is kept in memory before being written
+TOUCH_BATCH_SIZE = 10000
+
+
+def text_hash(text):
+    """Get the content hash of a text, which identical texts share."""
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+class PredictionCache:
+    """
+    Persistent cache of prediction dicts in a SQLite file, keyed by the content
+    hash of the text, the SDG and the hash of the saved model that scored it.
+
+    Once the cached predictions take more than `max_bytes`, `evict` removes the
+    least recently used ones. Eviction is left to the caller, so that processes
+    sharing the cache can add to it and evict once they are all done.
+    """
+
+    def __init__(
+        self, path=PREDICTION_CACHE_PATH, max_bytes=PREDICTION_CACHE_BYTES_LIMIT
+    ):
+        """
+        Parameters:
+            - path (str): The SQLite file, created if it doesn't exist.
+            - max_bytes (int): Size of the cached predictions to evict down to.
+        """
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        # Last use of the predictions looked up since the last `flush`, written in
+        # one go so that lookups don't take the write lock
+        self.touched = {}
+
+        # Several processes can read and write the cache at once
+        self.connection = sqlite3.connect(path, timeout=60)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS predictions ("
+            " text_hash TEXT NOT NULL,"
+            " sdg TEXT NOT NULL,"
+            " model_hash TEXT NOT NULL,"
+            " prediction TEXT NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " last_used REAL NOT NULL,"
+            " PRIMARY KEY (text_hash, sdg, model_hash))"
+        )
+        self.connection.execute(
+            "CREATE INDEX IF NOT EXISTS predictions_last_used"
+            " ON predictions (last_used)"
+        )
+        self.connection.commit()
+
+    def get_many(self, text_hashes, sdg, model_hash):
+        """
+        Look up the cached predictions of texts.
+
+        Parameters:
+            - text_hashes (list[str]): Content hashes of the texts (see `text_hash`).
+            - sdg (str): The SDG of the predictions.
+            - model_hash (str): Hash of the saved model (see
+                `model_registry.model_hash`).
+
+        Returns:
+            - dict: Maps the hash of each cached text to its prediction dict.
+        """
+        text_hashes = list(dict.fromkeys(text_hashes))
+        predictions = {}
+        for start in range(0, len(text_hashes), QUERY_BATCH_SIZE):
+            batch = text_hashes[start : start + QUERY_BATCH_SIZE]
+            rows = self.connection.execute(
+                "SELECT text_hash, prediction FROM predictions"
+                " WHERE sdg = ? AND model_hash = ?"
+                f" AND text_hash IN ({', '.join('?' * len(batch))})",
+                [sdg, model_hash, *batch],
+            )
+            predictions.update(
+                (key, json.loads(prediction)) for key, prediction in rows
+            )
+
+        self.hits += len(predictions)
+        self.misses += len(text_hashes) - len(predictions)
+        now = time.time()
+        self.touched.update(((key, sdg, model_hash), now) for key in predictions)
+        if len(self.touched) >= TOUCH_BATCH_SIZE:
+            self.flush()
+        return predictions
+
+    def put_many(self, predictions, sdg, model_hash):
+        """
+        Cache predictions.
+
+        Parameters:
+            - predictions (dict): Maps the content hash of each text to its
+                prediction dict.
+            - sdg (str): The SDG of the predictions.
+            - model_hash (str): Hash of the saved model.
+        """
+        now = time.time()
+        rows = []
+        for key, prediction in predictions.items():
+            prediction = json.dumps(prediction, default=to_json_value)
+            rows.append((key, sdg, model_hash, prediction, len(prediction), now))
+        self.connection.executemany(
+            "INSERT OR REPLACE INTO predictions"
+            " (text_hash, sdg, model_hash, prediction, size, last_used)"
+            " VALUES (?, ?, ?, ?, ?, ?)",
+            rows,
+        )
+        self.flush()
+
+    def predict_batch(self, texts, sdg, model_hash, predict_batch):
+        """
+        Get the predictions of texts, scoring only those that aren't cached.
+
+        Parameters:
+            - texts (list[str]): Texts to score.
+            - sdg (str): The SDG of the predictions.
+            - model_hash (str): Hash of the saved model.
+            - predict_batch (callable): Scores a list of texts, returning one
+                prediction dict per text.
+
+        Returns:
+            - list[dict]: One prediction dict per text.
+        """
+        keys = [text_hash(text) for text in texts]
+        predictions = self.get_many(keys, sdg, model_hash)
+
+        missing = {
+            key: text for key, text in zip(keys, texts) if key not in predictions
+        }
+        if len(missing) > 0:
+            scored = dict(zip(missing, predict_batch(list(missing.values()))))
+            self.put_many(scored, sdg, model_hash)
+            predictions.update(scored)
+        return [predictions[key] for key in keys]
+
+    def flush(self):
+        """Write the last use of the predictions looked up, and commit."""
+        if len(self.touched) > 0:
+            self.connection.executemany(
+                "UPDATE predictions SET last_used = ?"
+                " WHERE text_hash = ? AND sdg = ? AND model_hash = ?",
+                [(now, *key) for key, now in self.touched.items()],
+            )
+            self.touched = {}
+        self.connection.commit()
+
+    def evict(self):
+        """Remove the least recently used predictions until under `max_bytes`."""
+        self.flush()
+        (total,) = self.connection.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM predictions"
+        ).fetchone()
+        excess = total - self.max_bytes
+        if excess <= 0:
+            return
+
+        evicted = []
+        rows = self.connection.execute(
+            "SELECT rowid, size FROM predictions ORDER BY last_used, rowid"
+        )
+        for rowid, size in rows:
+            evicted.append((rowid,))
+            excess -= size
+            if excess <= 0:
+                break
+        rows.close()
+        self.connection.executemany("DELETE FROM predictions WHERE rowid = ?", evicted)
+        self.connection.commit()
+
+    def stats(self):
+        """
+        Get the hit rate of the lookups made through this instance.
+
+        Returns:
+            - dict: Number of hits and misses, and the fraction of lookups that hit.
+        """
+        lookups = self.hits + self.misses
+        return dict(
+            hits=self.hits,
+            misses=self.misses,
+            hit_rate=self.hits / lookups if lookups else 0,
+        )
+
+    def close(self):
+        """
+        Write the last use of the predictions looked up and close the SQLite file.
+        Call `evict` first to keep it under `max_bytes`.
+        """
+        self.flush()
+        self.connection.close()
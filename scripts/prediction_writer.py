@@ -0,0 +1,111 @@
+import json
+import os
+import shutil
+import sys
+
+sys.path.append("./scripts")
+import pandas as pd
+from file_org import write_data, concat_data
+
+
+class PredictionWriter:
+    """
+    Writes a prediction file chunk by chunk, so that an interrupted run can resume
+    after the last completed chunk.
+
+    Each chunk is written to its own file in "<path>.parts/", next to a checkpoint
+    recording the completed chunks and a fingerprint of what is being predicted
+    (e.g. the model and data hashes). A checkpoint with the same fingerprint is
+    resumed from, any other is discarded. `finish` combines the chunks into the
+    prediction file and removes the parts.
+    """
+
+    def __init__(self, path, fingerprint):
+        """
+        Parameters:
+            - path (str): Path to the prediction file.
+            - fingerprint (str): Identifies the predictions being written. Chunks are
+                only reused by a writer with the same fingerprint.
+        """
+        self.path = path
+        self.fingerprint = fingerprint
+        self.parts_dir = f"{path}.parts"
+        self.checkpoint_path = os.path.join(self.parts_dir, "checkpoint.json")
+        self.extension = os.path.splitext(path)[1]
+
+        checkpoint = self.load_checkpoint()
+        if checkpoint is not None and checkpoint["fingerprint"] == fingerprint:
+            self.parts = checkpoint["parts"]
+            self.completed_rows = checkpoint["completed_rows"]
+        else:
+            shutil.rmtree(self.parts_dir, ignore_errors=True)
+            self.parts = []
+            self.completed_rows = 0
+        os.makedirs(self.parts_dir, exist_ok=True)
+
+    def load_checkpoint(self):
+        if not os.path.exists(self.checkpoint_path):
+            return None
+        with open(self.checkpoint_path) as file:
+            return json.load(file)
+
+    def save_checkpoint(self):
+        checkpoint = dict(
+            fingerprint=self.fingerprint,
+            parts=self.parts,
+            completed_rows=self.completed_rows,
+        )
+        # Written to a temporary file first so a crash never leaves half a checkpoint
+        tmp_path = f"{self.checkpoint_path}.tmp"
+        with open(tmp_path, "w") as file:
+            json.dump(checkpoint, file)
+        os.replace(tmp_path, self.checkpoint_path)
+
+    def write(self, predictions):
+        """
+        Write the next chunk of predictions and checkpoint it.
+
+        Parameters:
+            - predictions (list[dict]): The prediction records of the chunk.
+        """
+        part = f"part-{len(self.parts):06d}{self.extension}"
+        write_part(predictions, os.path.join(self.parts_dir, part))
+        self.add_part(part, len(predictions))
+
+    def add_part(self, part, n_rows):
+        """
+        Checkpoint the next chunk of predictions, already written to the parts
+        directory (e.g. by `write_part` in another process).
+
+        Parameters:
+            - part (str): File name of the chunk in `parts_dir`.
+            - n_rows (int): Number of prediction records in the chunk.
+        """
+        self.parts.append(part)
+        self.completed_rows += n_rows
+        self.save_checkpoint()
+
+    def finish(self):
+        """Combine the written chunks into the prediction file and remove the parts."""
+        part_paths = [os.path.join(self.parts_dir, part) for part in self.parts]
+        tmp_path = os.path.join(self.parts_dir, f"tmp-combined{self.extension}")
+        if len(part_paths) == 0:
+            write_data(pd.DataFrame(), tmp_path)
+        else:
+            concat_data(part_paths, tmp_path)
+        os.replace(tmp_path, self.path)
+        shutil.rmtree(self.parts_dir)
+
+
+def write_part(predictions, path):
+    """
+    Write a chunk of prediction records to a file of a parts directory. It is
+    written to a temporary file first, so a crash never leaves half a chunk.
+
+    Parameters:
+    - predictions (list[dict]): The prediction records of the chunk.
+    - path (str): Path to the chunk's file.
+    """
+    tmp_path = os.path.join(os.path.dirname(path), f"tmp-{os.path.basename(path)}")
+    write_data(pd.DataFrame(predictions), tmp_path)
+    os.replace(tmp_path, path)
@@ -4,13 +4,42 @@ sys.path.append("./scripts")
 sys.path.append(".")
 from sklearn.model_selection import train_test_split, StratifiedKFold
 from file_org import (
-    get_doccano_export_paths,
+    get_doccano_export_projects,
+    load_doccano_export,
+    iter_doccano_export,
+    open_data_writer,
+    doccano_export_hash,
     save_data,
+    save_split,
     get_file_path,
-    load_data,
 )
+from concurrent.futures import ProcessPoolExecutor
+from instrumentation import stage
+import json
+import os
+import numpy as np
 import pandas as pd
-from variables import SEED, REQUIRED_COLS, REVERSE_SDG_MAP
+from label_matrix import (
+    SDGS,
+    SDG_INDEX,
+    encode_labels,
+    decode_labels,
+    pack_labels,
+    sdg_columns,
+    sdg_label,
+)
+from variables import (
+    SEED,
+    REQUIRED_COLS,
+    RAW_LIST_COLS,
+    REVERSE_SDG_MAP,
+    PROJECTNAME_DATA_PATHS,
+    PREPARE_MANIFEST_PATH,
+)
+
+# Bumped when the format of the raw or split files changes, so that projects
+# prepared by an older version are prepared again
+PREPARE_VERSION = 2
 
 """
 TODO:
@@ -24,20 +53,24 @@ def split_data(df, sdg):
 
     Parameters:
     - df (pd.DataFrame): The input DataFrame to be split.
-    - seed (int): Seed for reproducibility.
+    - sdg (str): The SDG to stratify the test set on.
 
     Returns:
-    - train_set (pd.DataFrame): 60% of the input DataFrame for training.
-    - dev_set (pd.DataFrame): 20% of the input DataFrame for development/validation.
-    - test_set (pd.DataFrame): 20% of the input DataFrame for testing.
-    - train_dev_set (pd.DataFrame): The combination of train and dev sets (80% of the input DataFrame).
+    - train_set (np.ndarray): Row positions of 60% of the input DataFrame for training.
+    - dev_set (np.ndarray): Row positions of 20% of the input DataFrame for development/validation.
+    - test_set (np.ndarray): Row positions of 20% of the input DataFrame for testing.
+    - train_dev_set (np.ndarray): The combination of train and dev sets (80% of the input DataFrame).
     """
 
-    df["train_label"] = prepare_labels(df["labels"], sdg)
+    if "label_bits" in df.columns:
+        train_labels = sdg_label(df["label_bits"], sdg)
+    else:
+        train_labels = prepare_labels(df["labels"], sdg)
+    positions = np.arange(len(df), dtype=np.int32)
 
     # Split the data into train_dev and test sets
     train_dev_set, test_set = train_test_split(
-        df, test_size=0.2, random_state=SEED, stratify=df["train_label"]
+        positions, test_size=0.2, random_state=SEED, stratify=train_labels
     )
 
     # Further split train_dev_set into train and dev sets
@@ -50,10 +83,10 @@ def split_data(df, sdg):
 
 
 def save_splits(project_name, train_set, dev_set, test_set, train_dev_set, sdg):
-    save_data(train_set, sdg=sdg, datatype="train", project_name=project_name)
-    save_data(dev_set, sdg=sdg, datatype="dev", project_name=project_name)
-    save_data(test_set, sdg=sdg, datatype="test", project_name=project_name)
-    save_data(train_dev_set, sdg=sdg, datatype="traindev", project_name=project_name)
+    save_split(train_set, sdg=sdg, datatype="train", project_name=project_name)
+    save_split(dev_set, sdg=sdg, datatype="dev", project_name=project_name)
+    save_split(test_set, sdg=sdg, datatype="test", project_name=project_name)
+    save_split(train_dev_set, sdg=sdg, datatype="traindev", project_name=project_name)
 
 
 def check_cols(df: pd.DataFrame, cols: list):
@@ -84,27 +117,110 @@ def prepare_raw(project_name: str, dataframes: list[pd.DataFrame]):
     Parameters:
     - project_name (str): The name of the project.
     - dataframes (list[pd.DataFrame]): A list of pandas DataFrames to be processed.
+
+    Returns:
+    - pd.DataFrame: The combined data, as saved to the project's raw file.
     """
-    combined_df = pd.concat(dataframes)
-    combined_df = combined_df[REQUIRED_COLS]
+    combined_df = pd.concat(dataframes, ignore_index=True)
+    combined_df = process_raw(combined_df)
 
-    map_cats = lambda cats: [REVERSE_SDG_MAP[sdg] for sdg in cats]
-    map_ents = lambda ents: [
-        [start, stop, REVERSE_SDG_MAP[sdg]] for start, stop, sdg in ents
-    ]
+    save_data(combined_df, "raw", project_name, False)
+    return combined_df
+
+
+def prepare_raw_chunks(project_name: str, chunks):
+    """
+    Streaming version of `prepare_raw`: each chunk of outlines is processed and
+    appended to the project's raw file before the next chunk is read.
 
-    combined_df["cats"] = combined_df["cats"].apply(map_cats)
-    combined_df["entities"] = combined_df["entities"].apply(map_ents)
-    combined_df["labels"] = combined_df.apply(
-        lambda row: list(
-            set(row["cats"]).union({sdg for _, _, sdg in row["entities"]})
-        ),
-        axis=1,
+    Parameters:
+    - project_name (str): The name of the project.
+    - chunks (Iterable[pd.DataFrame]): Chunks of doccano export rows, each indexed
+        from 0 (see `file_org.iter_doccano_export`).
+
+    Returns:
+    - pd.Series: The packed labels of each outline (see `label_matrix.pack_labels`).
+    """
+    label_bits = []
+    with open_data_writer(
+        get_file_path("raw", project_name), json_columns=RAW_LIST_COLS
+    ) as writer:
+        for chunk in chunks:
+            chunk = process_raw(chunk)
+            writer.write(chunk)
+            label_bits.append(chunk["label_bits"].to_numpy())
+
+    label_bits = np.concatenate(label_bits) if label_bits else []
+    return pd.Series(label_bits, dtype=np.uint16)
+
+
+def process_raw(df: pd.DataFrame):
+    """
+    Select the required columns of doccano export rows, remap SDG names into a
+    simpler format and add the "labels", "has_sdg" and "label_bits" columns.
+
+    Parameters:
+    - df (pd.DataFrame): Doccano export rows, indexed from 0.
+
+    Returns:
+    - pd.DataFrame: The processed rows.
+    """
+    df = df[REQUIRED_COLS].copy()
+
+    n_rows = len(df)
+    cats = df["cats"].explode().dropna()
+    cat_sdgs = map_sdg_names(cats)
+    entities = df["entities"].explode().dropna()
+    entities = pd.DataFrame(
+        entities.tolist(), index=entities.index, columns=["start", "stop", "sdg"]
     )
+    entities["sdg"] = map_sdg_names(entities["sdg"])
 
-    combined_df["has_sdg"] = combined_df["labels"].apply(lambda labels: len(labels) > 0)
+    df["cats"] = group_lists(cat_sdgs, n_rows)
+    df["entities"] = group_lists(
+        pd.Series(entities.to_numpy(dtype=object).tolist(), index=entities.index),
+        n_rows,
+    )
 
-    save_data(combined_df, "raw", project_name, False)
+    # One column per SDG, set where the SDG is a category or an entity label
+    label_matrix = np.zeros((n_rows, len(SDGS)), dtype=bool)
+    label_matrix[cats.index.to_numpy(), sdg_columns(cat_sdgs)] = True
+    label_matrix[entities.index.to_numpy(), sdg_columns(entities["sdg"])] = True
+
+    df["labels"] = decode_labels(label_matrix)
+    df["has_sdg"] = label_matrix.any(axis=1)
+    df["label_bits"] = pack_labels(label_matrix)
+    return df
+
+
+def map_sdg_names(sdg_names):
+    """
+    Map full SDG names (e.g. "1 - No Poverty") to their short form (e.g. "SDG 1").
+
+    Raises:
+    - KeyError: If a name isn't in REVERSE_SDG_MAP.
+    """
+    sdgs = sdg_names.map(REVERSE_SDG_MAP)
+    unknown = sdgs.isna()
+    if unknown.any():
+        raise KeyError(sdg_names[unknown].iloc[0])
+    return sdgs
+
+
+def group_lists(values: pd.Series, n_rows: int):
+    """
+    Collect exploded values back into one list per row.
+
+    Parameters:
+    - values (pd.Series): Values indexed by the position of their row, in row order.
+    - n_rows (int): The number of rows.
+
+    Returns:
+    - list[list]: The values of each row, empty for rows without values.
+    """
+    bounds = np.searchsorted(values.index.to_numpy(), np.arange(n_rows + 1)).tolist()
+    values = values.tolist()
+    return [values[start:end] for start, end in zip(bounds[:-1], bounds[1:])]
 
 
 def prepare_labels(labels: list[list[str]], sdg: str):
@@ -119,29 +235,138 @@ def prepare_labels(labels: list[list[str]], sdg: str):
     Returns:
     - list: List of 1/0 values indicating the presence of a string in each sublist.
     """
-    processed_labels = []
-    for sublist in labels:
-        if sdg in sublist:
-            processed_labels.append(1)
+    return encode_labels(labels)[:, SDG_INDEX[sdg]].astype(int).tolist()
+
+
+def prepare_project(project_name, chunksize=None):
+    """
+    Combine the doccano exports of a project into its raw file. Runs inside a worker
+    process.
+
+    Parameters:
+    - project_name (str): The name of the project.
+    - chunksize (int): Stream the exports in chunks of this many outlines (see
+        `prepare_raw_chunks`). Loads the exports at once by default.
+
+    Returns:
+    - pd.Series: The packed labels of each outline (see `label_matrix.pack_labels`).
+    """
+    with stage("prepare_project", project_name=project_name) as record:
+        if chunksize is not None:
+            chunks = iter_doccano_export(project_name, chunksize, columns=REQUIRED_COLS)
+            label_bits = prepare_raw_chunks(project_name, chunks)
         else:
-            processed_labels.append(0)
-    return processed_labels
+            dataframes = load_doccano_export(project_name, columns=REQUIRED_COLS)
+            label_bits = prepare_raw(project_name, dataframes)["label_bits"]
+        record["rows"] = len(label_bits)
+    return label_bits
 
 
-def main():
+def prepare_split(project_name, label_bits, sdg):
     """
-    Take project files from /data/doccano_export and process and split the data.
+    Split a project for an SDG and save the splits. Runs inside a worker process.
+
+    Parameters:
+    - project_name (str): The name of the project.
+    - label_bits (pd.Series): The packed labels of each outline in the project's
+        raw data.
+    - sdg (str): The SDG to split for.
     """
-    for project_name, dataframes in get_doccano_export_paths():
-        prepare_raw(project_name, dataframes)
-        raw_df = load_data(get_file_path("raw", project_name))
-        if "labels" not in raw_df.columns:
-            print(f"Skipping {project_name} as it's missing the 'labels' column.")
-            continue
+    with stage("prepare_split", len(label_bits), project_name=project_name, sdg=sdg):
+        splits = split_data(pd.DataFrame({"label_bits": label_bits}), sdg)
+        save_splits(project_name, *splits, sdg)
 
-        for sdg in REVERSE_SDG_MAP.values():
-            split_dfs = split_data(raw_df, sdg)
-            save_splits(project_name, *split_dfs, sdg)
+
+def load_prepare_manifest(path=PREPARE_MANIFEST_PATH):
+    """
+    Load the fingerprints of the doccano exports each project was prepared from.
+
+    Returns:
+    - dict: Maps each project name to PREPARE_VERSION and its `doccano_export_hash`.
+    """
+    if not os.path.exists(path):
+        return {}
+    with open(path) as file:
+        return json.load(file)
+
+
+def save_prepare_manifest(manifest, path=PREPARE_MANIFEST_PATH):
+    """Save the fingerprints of the prepared projects."""
+    with open(path, "w") as file:
+        json.dump(manifest, file, indent=1)
+
+
+def is_prepared(project_name, export_hash, manifest):
+    """
+    Check if a project was prepared from the same doccano exports and all of its
+    files still exist.
+    """
+    if manifest.get(project_name) != export_hash:
+        return False
+    paths = [
+        template(sdg, project_name)
+        for datatype, template in PROJECTNAME_DATA_PATHS.items()
+        if datatype != "raw"
+        for sdg in REVERSE_SDG_MAP.values()
+    ]
+    paths.append(get_file_path("raw", project_name))
+    return all(os.path.exists(path) for path in paths)
+
+
+def main(max_workers=None, force=False, chunksize=None):
+    """
+    Take project files from /data/doccano_export and process and split the data.
+
+    Projects whose doccano exports haven't changed since they were last prepared are
+    skipped. Projects, and then the splits of each SDG, are processed across a
+    process pool.
+
+    Parameters:
+    - max_workers (int): Number of worker processes. Defaults to one per core.
+    - force (bool): Prepare every project, even if its exports haven't changed.
+    - chunksize (int): Stream the doccano exports in chunks of this many outlines,
+        keeping memory use bounded for large exports. Loads each project's exports
+        at once by default.
+    """
+    with stage("prepare_data", rows=0) as record:
+        manifest = {} if force else load_prepare_manifest()
+        export_hashes = {
+            project_name: f"{PREPARE_VERSION}:{doccano_export_hash(project_name)}"
+            for project_name in get_doccano_export_projects()
+        }
+        project_names = [
+            project_name
+            for project_name, export_hash in export_hashes.items()
+            if not is_prepared(project_name, export_hash, manifest)
+        ]
+        print(f"Preparing {len(project_names)} of {len(export_hashes)} projects")
+
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            project_futures = {
+                project_name: executor.submit(prepare_project, project_name, chunksize)
+                for project_name in project_names
+            }
+            split_futures = {}
+            for project_name, future in project_futures.items():
+                label_bits = future.result()
+                record["rows"] += len(label_bits)
+                split_futures[project_name] = [
+                    executor.submit(prepare_split, project_name, label_bits, sdg)
+                    for sdg in REVERSE_SDG_MAP.values()
+                ]
+
+            for project_name, futures in split_futures.items():
+                for future in futures:
+                    future.result()
+                manifest[project_name] = export_hashes[project_name]
+
+        save_prepare_manifest(
+            {
+                project_name: manifest[project_name]
+                for project_name in export_hashes
+                if project_name in manifest
+            }
+        )
 
 
 if __name__ == "__main__":
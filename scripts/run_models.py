@@ -6,133 +6,859 @@ sys.path.append("./scripts")
 from variables import (
     SDG_MAP,
     MODEL_TEMPLATE,
-    GET_MODEL_DETAILS,
+    ARTIFACT_TEMPLATE,
     PREDICTIONS_TEMPLATE,
+    TOKENS_TEMPLATE,
 )
 import importlib
-import dill
+import shutil
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from file_org import (
     get_all_project_names,
     load_data,
+    data_hash,
     get_file_path,
     iterdatatype_data,
+    iterdatatype_project_data,
+    get_datatype_paths,
+    count_rows,
+    load_rows,
 )
+from multi_sdg import build_multi_sdg_predictor
+from model_artifacts import save_artifact
+from model_registry import (
+    ModelRegistry,
+    load_model,
+    get_model_names,
+    get_model_path,
+    model_hash,
+)
+from text_processing import TokenCache
+from prediction_writer import PredictionWriter, write_part
+from prediction_cache import PredictionCache, text_hash
 from prepare_data import prepare_labels
-from glob import glob
+from instrumentation import stage, hook
+from cached_search import reduce_vectorizer_cache
 import json
 import pandas as pd
 
 
-def load_model(file_path):
+def save_model(model_instance, sdg, model_name):
     """
-    Load the TextAnalyticsModel instance from a file.
+    Save a trained model as a model artifact if possible, otherwise with dill. The
+    other format's file is removed, so each model is saved once.
 
     Parameters:
-    - file_path (str): File path to load the model from.
+    - model_instance (TextAnalyticsModel): The trained model.
+    - sdg (str): The SDG the model was trained for.
+    - model_name (str): Name of the module in `models/`.
 
     Returns:
-    - TextAnalyticsModel: Loaded model instance.
+    - str: Path to the saved model.
     """
-    with open(file_path, "rb") as file:
-        loaded_model = dill.load(file)
+    artifact_path = ARTIFACT_TEMPLATE(sdg, model_name)
+    dill_path = MODEL_TEMPLATE(sdg, model_name)
+    try:
+        save_artifact(model_instance, model_name, artifact_path)
+        saved_path, other_path = artifact_path, dill_path
+    except ValueError:
+        # e.g. rules models, which have no fitted arrays
+        model_instance.save(dill_path)
+        saved_path, other_path = dill_path, artifact_path
 
-    return loaded_model
+    if os.path.isdir(other_path):
+        shutil.rmtree(other_path)
+    elif os.path.exists(other_path):
+        os.remove(other_path)
+    return saved_path
 
 
 def iterate_model_files():
-    # Get the path to the models directory
-    model_path = os.path.join(os.path.dirname(__file__), "..", "models")
+    """Import each module in `models/` and yield its name and TextAnalyticsModel class."""
+    registry = ModelRegistry()
+    for model_name in registry.model_names:
+        textanalytics_class = registry.get_model_class(model_name)
+        if textanalytics_class is not None:
+            yield model_name, textanalytics_class
+
+
+def iterate_saved_models(ignore_models=(), registry=None):
+    """
+    Load the saved models one at a time. Ignored models are skipped without being
+    loaded.
+
+    Parameters:
+    - ignore_models (list[str]): Model names to skip.
+    - registry (ModelRegistry): Registry to load the models from. A new one by
+        default.
+
+    Yields:
+    - tuple: The SDG, model name and loaded model.
+    """
+    registry = registry or ModelRegistry()
+    for sdg, model_name in registry.saved_models(ignore_models):
+        yield sdg, model_name, registry.get_model(sdg, model_name)
+
+
+def select_project(project, available_projects):
+    """
+    Resolve a project selection without prompting.
+
+    Parameters:
+    - project (str, int or None): Project name or index into the sorted list of
+        available projects. Can be None if only one project is available.
+    - available_projects (list[str]): Sorted project names.
+
+    Returns:
+    - str: The selected project name.
+
+    Raises:
+    - ValueError: If the selection doesn't match an available project.
+    """
+    options = ", ".join(
+        f"[{i}] {project_name}" for i, project_name in enumerate(available_projects)
+    )
+    if project is None:
+        if len(available_projects) == 1:
+            return available_projects[0]
+        raise ValueError(f"Several projects are available, choose one of: {options}")
+
+    if project in available_projects:
+        return project
+    if isinstance(project, int) or str(project).isdigit():
+        project_index = int(project)
+        if project_index in range(len(available_projects)):
+            return available_projects[project_index]
+
+    raise ValueError(
+        f"Invalid selection '{project}'. Please choose one of the available options: {options}"
+    )
+
+
+def train_model_job(sdg, model_name, project_name, n_jobs):
+    """
+    Train and save a single (sdg, model) pair. Runs inside a worker process.
+
+    Parameters:
+    - sdg (str): The SDG to train for.
+    - model_name (str): Name of the module in `models/`.
+    - project_name (str): The project to train on.
+    - n_jobs (int): Number of cores the model may use for cross-validation.
+
+    Returns:
+    - dict: Job details with the training time in seconds, the number of training
+        rows and the error, if any.
+    """
+    start = time.perf_counter()
+    result = dict(sdg=sdg, model_name=model_name, rows=0, error=None)
+    try:
+        with stage(
+            "train_model", sdg=sdg, model_name=model_name, project_name=project_name
+        ) as record:
+            data = load_data(
+                get_file_path("traindev", project_name, sdg),
+                columns=["text", "train_label"],
+            )
+            text, labels = data["text"], data["train_label"]
+            result["rows"] = record["rows"] = len(text)
+            record["positives"] = int(labels.sum())
 
-    # Iterate over Python files in the models directory
-    for filename in os.listdir(model_path):
-        if filename.endswith(".py") and not filename.startswith("__"):
-            model_name = os.path.splitext(filename)[0]
             module = importlib.import_module(f"models.{model_name}")
+            model_instance = module.TextAnalyticsModel(sdg)
+            model_instance.n_jobs = n_jobs
+            if model_instance.preprocessed_input:
+                # Tokens were computed by the parent process, so this only reads them
+                token_cache = TokenCache(TOKENS_TEMPLATE(project_name))
+                preprocessed_text = token_cache.normalize_all(text)
+                model_instance.train(text, labels, preprocessed_text)
+            else:
+                model_instance.train(text, labels)
+            save_model(model_instance, sdg, model_name)
+    except Exception:
+        result["error"] = traceback.format_exc()
 
-            # Check if the module has a "predict" function
-            if hasattr(module, "TextAnalyticsModel"):
-                yield model_name, module.TextAnalyticsModel
+    result["seconds"] = time.perf_counter() - start
+    return result
 
 
-def iterate_saved_models():
-    for model_path in glob(MODEL_TEMPLATE()):
-        model_instance = load_model(model_path)
-        filename = os.path.basename(model_path)
-        sdg, model_name = GET_MODEL_DETAILS(filename)
-        yield sdg, model_name, model_instance
+def train_models(project=None, n_cpus=None, max_workers=None):
+    """
+    Train every model in `models/` for every SDG with a particular project.
+
+    (sdg, model) jobs run across a process pool. The cores left to each job are
+    used for its cross-validation, so the total never exceeds `n_cpus`. A failing
+    job is reported and doesn't stop the others.
 
+    Parameters:
+    - project (str, int or None): Project name or index into the sorted list of
+        available projects. Can be None if only one project is available.
+    - n_cpus (int): Total number of cores to use. Defaults to all cores.
+    - max_workers (int): Number of jobs to run at once. Defaults to one per core.
 
-def train_models():
+    Returns:
+    - list[dict]: Details of each job, see `train_model_job`.
     """
-    Train models with a particular project.
+    with stage("train_models") as record:
+        ##########
+        # GET DATA
+        ##########
+        available_projects = sorted(get_all_project_names("raw"))
+        assert len(available_projects) > 0, "No processed datasets available."
+        selected_project = select_project(project, available_projects)
+        record["project_name"] = selected_project
+
+        # Normalized text is computed once per project and shared by every SDG/model
+        token_cache = TokenCache(TOKENS_TEMPLATE(selected_project))
+        raw_data = load_data(get_file_path("raw", selected_project), columns=["text"])
+        token_cache.normalize_all(raw_data["text"])
+        token_cache.save()
+
+        #############
+        # TRAIN MODEL
+        #############
+        model_names = get_model_names()
+        jobs = [(sdg, model_name) for sdg in SDG_MAP for model_name in model_names]
+        n_cpus = n_cpus or os.cpu_count() or 1
+        max_workers = min(max_workers or n_cpus, n_cpus, len(jobs))
+        n_jobs = max(1, n_cpus // max_workers)
+        print(
+            f"Training {len(jobs)} models on {selected_project} with {max_workers} "
+            f"workers and {n_jobs} core(s) per worker"
+        )
+
+        results = []
+        start = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                executor.submit(
+                    train_model_job, sdg, model_name, selected_project, n_jobs
+                ): (sdg, model_name)
+                for sdg, model_name in jobs
+            }
+            for future in as_completed(futures):
+                sdg, model_name = futures[future]
+                try:
+                    result = future.result()
+                except Exception:
+                    # The worker process itself died
+                    result = dict(
+                        sdg=sdg,
+                        model_name=model_name,
+                        rows=0,
+                        error=traceback.format_exc(),
+                        seconds=None,
+                    )
+                status = "failed" if result["error"] else "trained"
+                print(f"{sdg} {model_name} {status} in {result['seconds'] or 0:.1f}s")
+                results.append(result)
+        # Only once every search is done, so that no worker reads evicted entries
+        reduce_vectorizer_cache()
+
+        results.sort(
+            key=lambda result: jobs.index((result["sdg"], result["model_name"]))
+        )
+        record["rows"] = sum(result["rows"] for result in results)
+        failed = [result for result in results if result["error"]]
+        print(
+            f"Trained {len(results) - len(failed)} of {len(jobs)} models in "
+            f"{time.perf_counter() - start:.1f}s"
+        )
+        for result in failed:
+            print(
+                f"\n{result['sdg']} {result['model_name']} failed:\n{result['error']}"
+            )
+
+        return results
+
+
+def prediction_records(texts, predictions, include_text=True):
     """
-    ##########
-    # GET DATA
-    ##########
-    # Get the list of available projects and offer them as options for training
-    available_projects = sorted(get_all_project_names("raw"))
-    assert len(available_projects) > 0, "No processed datasets available."
+    Build the rows of a prediction file.
 
-    option_list = "\n".join(
-        [
-            f"\t - [{i}] {project_name}"
-            for i, project_name in enumerate(available_projects)
+    Parameters:
+    - texts (pd.Series): The predicted texts, indexed by their row in the data.
+    - predictions (list[dict]): The prediction of each text.
+    - include_text (bool): Whether to repeat each text in its row.
+
+    Returns:
+    - list[dict]: A row with the "index", "text" and "prediction" of each text.
+    """
+    if include_text:
+        return [
+            dict(index=i, text=text, prediction=prediction)
+            for (i, text), prediction in zip(texts.items(), predictions)
         ]
+    return [
+        dict(index=i, prediction=prediction)
+        for i, prediction in zip(texts.index, predictions)
+    ]
+
+
+def prediction_fingerprint(sdg, model_name, project_name, datatype, include_text):
+    """
+    Identify the predictions of a model on a project's data, so that a checkpoint is
+    only resumed from if the model, the data and the output options are unchanged.
+
+    Returns:
+    - str: The fingerprint (see `PredictionWriter`).
+    """
+    return json.dumps(
+        dict(
+            model=model_hash(get_model_path(sdg, model_name)),
+            data=data_hash(get_file_path(datatype, project_name, sdg)),
+            include_text=include_text,
+        )
     )
 
-    project_index = input(
-        f"Which project would you like to train the model on:\n{option_list}\n\nSelect the project for training: "
+
+def open_prediction_writer(
+    sdg, model_name, project_name, datatype, overwrite, include_text
+):
+    """
+    Open a writer for a prediction file, resuming an interrupted run if possible.
+
+    Returns:
+    - PredictionWriter: The writer, or None if the file exists and overwrite is False.
+    """
+    prediction_path = PREDICTIONS_TEMPLATE(sdg, model_name, project_name, datatype)
+    if not overwrite and os.path.exists(prediction_path):
+        print(f"Skipping {prediction_path}, as it exists and overwrite is set to False")
+        return None
+
+    fingerprint = prediction_fingerprint(
+        sdg, model_name, project_name, datatype, include_text
     )
-    if project_index.isdigit():
-        project_index = int(project_index)
-
-    assert project_index in range(
-        len(available_projects)
-    ), f"Invalid selection. Please choose one of the available options, [{list(range(len(available_projects)))}]"
-
-    selected_project = available_projects[project_index]
-
-    #############
-    # TRAIN MODEL
-    #############
-    for sdg in SDG_MAP:
-        data = load_data(get_file_path("traindev", selected_project, sdg))
-        text, labels = data["text"], data["train_label"]
-        for model_name, model in iterate_model_files():
-            model_instance = model(sdg)
-            model_instance.train(text, labels)
-            model_filepath = MODEL_TEMPLATE(sdg, model_name)
-            model_instance.save(model_filepath)
-
-
-def save_predictions(path, predictions):
-    """Save predictions in json file in list format."""
-    prediction_df = pd.DataFrame(predictions)
-    prediction_df.to_json(path, orient="records", lines=True)
-
-
-def predict_models(datatype, ignore_models=[], overwrite=True):
-    for sdg, model_name, model_instance in iterate_saved_models():
-        if model_name in ignore_models:
-            print(f"Ignoring {model_name}")
-            continue
-        for project_name, data in iterdatatype_data(datatype, sdg):
-            prediction_path = PREDICTIONS_TEMPLATE(
-                sdg, model_name, project_name, datatype
+    writer = PredictionWriter(prediction_path, fingerprint)
+    if writer.completed_rows > 0:
+        print(f"Resuming {prediction_path} from row {writer.completed_rows}")
+    return writer
+
+
+def predict_models(
+    datatype,
+    ignore_models=[],
+    overwrite=True,
+    batch_size=1000,
+    multi_sdg=False,
+    include_text=True,
+    use_cache=True,
+    max_workers=None,
+    shard_rows=10000,
+):
+    """
+    Generate predictions for every saved model on a given datatype.
+
+    Predictions are written to disk every `batch_size` rows, and a run that was
+    interrupted resumes after the last written batch (see `PredictionWriter`).
+    Texts scored by the same saved model in an earlier run are taken from the
+    prediction cache (see `PredictionCache`) instead of being scored again.
+    With `max_workers`, the predictions are made across a process pool instead
+    (see `predict_models_parallel`).
+
+    Parameters:
+    - datatype (str): The datatype to predict on (e.g. "test", "raw").
+    - ignore_models (list[str]): Model names to skip.
+    - overwrite (bool): Whether to overwrite existing prediction files.
+    - batch_size (int): Number of texts passed to `predict_batch`, and written to
+        disk, at once.
+    - multi_sdg (bool): Score all SDGs of a model in one pass over each project's
+        data (see `predict_models_multi_sdg`).
+    - include_text (bool): Whether to repeat each text in the prediction files.
+    - use_cache (bool): Whether to use the prediction cache.
+    - max_workers (int): Number of worker processes. Predicts in this process by
+        default.
+    - shard_rows (int): Most rows of a file predicted by one worker task, when
+        predicting across a process pool.
+    """
+    if max_workers is not None and multi_sdg:
+        raise ValueError("multi_sdg predictions can't be made across processes.")
+
+    with stage(
+        "predict_models",
+        datatype=datatype,
+        multi_sdg=multi_sdg,
+        max_workers=max_workers,
+    ) as record:
+        if max_workers is not None:
+            record["rows"] = predict_models_parallel(
+                datatype,
+                ignore_models,
+                overwrite,
+                batch_size,
+                include_text,
+                use_cache,
+                max_workers,
+                shard_rows,
             )
+            return
 
-            if not overwrite and os.path.exists(prediction_path):
-                print(
-                    f"Skipping {prediction_path}, as it exists and overwrite is set to False"
+        prediction_cache = PredictionCache() if use_cache else None
+        try:
+            if multi_sdg:
+                record["rows"] = predict_models_multi_sdg(
+                    datatype,
+                    ignore_models,
+                    overwrite,
+                    batch_size,
+                    include_text,
+                    prediction_cache,
+                )
+            else:
+                record["rows"] = predict_models_single_sdg(
+                    datatype,
+                    ignore_models,
+                    overwrite,
+                    batch_size,
+                    include_text,
+                    prediction_cache,
                 )
+        finally:
+            if prediction_cache is not None:
+                print_cache_stats(prediction_cache.stats())
+                prediction_cache.evict()
+                prediction_cache.close()
+
+
+def print_cache_stats(stats):
+    """Print the hit rate of the prediction cache (see `PredictionCache.stats`)."""
+    print(
+        f"Prediction cache: {stats['hits']} hits, {stats['misses']} misses "
+        f"({stats['hit_rate']:.1%} hit rate)"
+    )
+
+
+def predict_models_single_sdg(
+    datatype,
+    ignore_models=[],
+    overwrite=True,
+    batch_size=1000,
+    include_text=True,
+    prediction_cache=None,
+):
+    """
+    Generate predictions for every saved model, one SDG model at a time.
+
+    Parameters:
+    - datatype (str): The datatype to predict on (e.g. "test", "raw").
+    - ignore_models (list[str]): Model names to skip.
+    - overwrite (bool): Whether to overwrite existing prediction files.
+    - batch_size (int): Number of texts passed to `predict_batch`, and written to
+        disk, at once.
+    - include_text (bool): Whether to repeat each text in the prediction files.
+    - prediction_cache (PredictionCache): Cache the models look up and save their
+        predictions in. None for no cache.
+
+    Returns:
+    - int: Number of rows predicted.
+    """
+    for model_name in ignore_models:
+        print(f"Ignoring {model_name}")
+
+    n_rows = 0
+    registry = ModelRegistry(prediction_cache=prediction_cache)
+    for sdg, model_name, model_instance in iterate_saved_models(
+        ignore_models, registry
+    ):
+        for project_name, data in iterdatatype_data(datatype, sdg, columns=["text"]):
+            writer = open_prediction_writer(
+                sdg, model_name, project_name, datatype, overwrite, include_text
+            )
+            if writer is None:
                 continue
 
             text_list = data["text"]
-            predictions = [
-                dict(index=i, text=text, prediction=model_instance.predict(text))
-                for i, text in text_list.items()
-            ]
-            save_predictions(prediction_path, predictions)
+            for start in range(writer.completed_rows, len(text_list), batch_size):
+                batch = text_list.iloc[start : start + batch_size]
+                batch_predictions = model_instance.predict_batch(batch.tolist())
+                writer.write(prediction_records(batch, batch_predictions, include_text))
+                n_rows += len(batch)
+            writer.finish()
+    return n_rows
+
+
+# Models of a prediction worker process, loaded once by `init_predict_worker`
+WORKER_REGISTRY = {}
+
+
+def init_predict_worker(use_cache):
+    """Set up the model registry of a prediction worker process."""
+    prediction_cache = PredictionCache() if use_cache else None
+    WORKER_REGISTRY["registry"] = ModelRegistry(prediction_cache=prediction_cache)
+
+
+def predict_shard_job(
+    sdg,
+    model_name,
+    project_name,
+    datatype,
+    start,
+    stop,
+    part_path,
+    batch_size,
+    include_text,
+):
+    """
+    Predict a range of rows of a project's data with one saved model, and write
+    the prediction records to a part file. Runs inside a worker process, which
+    keeps the models it loaded for its later shards.
+
+    Parameters:
+    - sdg (str): The SDG of the model.
+    - model_name (str): Name of the saved model.
+    - project_name (str): The project to predict on.
+    - datatype (str): The datatype to predict on (e.g. "test", "raw").
+    - start (int): Position of the first row to predict.
+    - stop (int): Position after the last row to predict.
+    - part_path (str): Where to write the prediction records (see `write_part`).
+    - batch_size (int): Number of texts passed to `predict_batch` at once.
+    - include_text (bool): Whether to repeat each text in the prediction records.
+
+    Returns:
+    - dict: Number of rows predicted, and prediction cache hits and misses.
+    """
+    registry = WORKER_REGISTRY["registry"]
+    prediction_cache = registry.prediction_cache
+    stats = prediction_cache.stats() if prediction_cache is not None else None
+
+    with stage(
+        "predict_shard",
+        rows=stop - start,
+        sdg=sdg,
+        model_name=model_name,
+        project_name=project_name,
+        datatype=datatype,
+        start=start,
+    ):
+        model_instance = registry.get_model(sdg, model_name)
+        path = get_file_path(datatype, project_name, sdg)
+        text_list = load_rows(path, start, stop, columns=["text"])["text"]
+        records = []
+        for batch_start in range(0, len(text_list), batch_size):
+            batch = text_list.iloc[batch_start : batch_start + batch_size]
+            batch_predictions = model_instance.predict_batch(batch.tolist())
+            records.extend(prediction_records(batch, batch_predictions, include_text))
+        write_part(records, part_path)
+
+    result = dict(rows=len(records), hits=0, misses=0)
+    if prediction_cache is not None:
+        prediction_cache.flush()
+        result["hits"] = prediction_cache.hits - stats["hits"]
+        result["misses"] = prediction_cache.misses - stats["misses"]
+    return result
+
+
+def predict_models_parallel(
+    datatype,
+    ignore_models=[],
+    overwrite=True,
+    batch_size=1000,
+    include_text=True,
+    use_cache=True,
+    max_workers=None,
+    shard_rows=10000,
+):
+    """
+    Generate predictions for every saved model across a process pool.
+
+    Every (sdg, model, project) file is split into shards of at most `shard_rows`
+    rows, and the shards of all files share one pool of `max_workers` processes.
+    Each worker loads a saved model the first time it predicts with it. Finished
+    shards are checkpointed in row order (see `PredictionWriter`), so the
+    prediction files are the same as those of `predict_models_single_sdg` and an
+    interrupted run resumes after the last shard of a file that was checkpointed.
+
+    Parameters:
+    - datatype (str): The datatype to predict on (e.g. "test", "raw").
+    - ignore_models (list[str]): Model names to skip.
+    - overwrite (bool): Whether to overwrite existing prediction files.
+    - batch_size (int): Number of texts passed to `predict_batch` at once.
+    - include_text (bool): Whether to repeat each text in the prediction files.
+    - use_cache (bool): Whether the workers use the prediction cache.
+    - max_workers (int): Number of worker processes. Defaults to one per core.
+    - shard_rows (int): Most rows predicted by one worker task.
+
+    Returns:
+    - int: Number of rows predicted.
+    """
+    for model_name in ignore_models:
+        print(f"Ignoring {model_name}")
+
+    writers = {}
+    shards = []
+    for sdg, model_name in ModelRegistry().saved_models(ignore_models):
+        for project_name, path in get_datatype_paths(datatype, sdg).items():
+            writer = open_prediction_writer(
+                sdg, model_name, project_name, datatype, overwrite, include_text
+            )
+            if writer is None:
+                continue
+
+            # Raw data loaded here is shared with the forked workers
+            file_rows = count_rows(path, columns=["text"])
+            key = (sdg, model_name, project_name)
+            writers[key] = (writer, file_rows, {})
+            for start in range(writer.completed_rows, file_rows, shard_rows):
+                shards.append((key, start, min(start + shard_rows, file_rows)))
+            if writer.completed_rows >= file_rows:
+                writer.finish()
+
+    n_rows = hits = misses = 0
+    with ProcessPoolExecutor(
+        max_workers=max_workers, initializer=init_predict_worker, initargs=(use_cache,)
+    ) as executor:
+        futures = {}
+        for key, start, stop in shards:
+            sdg, model_name, project_name = key
+            writer = writers[key][0]
+            part = f"shard-{start:012d}{writer.extension}"
+            future = executor.submit(
+                predict_shard_job,
+                sdg,
+                model_name,
+                project_name,
+                datatype,
+                start,
+                stop,
+                os.path.join(writer.parts_dir, part),
+                batch_size,
+                include_text,
+            )
+            futures[future] = (key, start, part)
+
+        try:
+            for future in as_completed(futures):
+                key, start, part = futures[future]
+                result = future.result()
+                n_rows += result["rows"]
+                hits += result["hits"]
+                misses += result["misses"]
+
+                # Shards finish in any order, but are added to the file in row order
+                writer, file_rows, finished = writers[key]
+                finished[start] = (part, result["rows"])
+                while writer.completed_rows in finished:
+                    writer.add_part(*finished.pop(writer.completed_rows))
+                if writer.completed_rows >= file_rows and len(finished) == 0:
+                    writer.finish()
+        except BaseException:
+            for future in futures:
+                future.cancel()
+            raise
+
+    if use_cache:
+        lookups = hits + misses
+        print_cache_stats(
+            dict(hits=hits, misses=misses, hit_rate=hits / lookups if lookups else 0)
+        )
+        # The workers only add to the cache, it is evicted once they are done
+        prediction_cache = PredictionCache()
+        prediction_cache.evict()
+        prediction_cache.close()
+    return n_rows
+
+
+def get_model_sdgs(registry, ignore_models=()):
+    """
+    Group the saved models by model name.
+
+    Parameters:
+    - registry (ModelRegistry): Registry of the saved models.
+    - ignore_models (list[str]): Model names to leave out.
+
+    Returns:
+    - dict: Maps each model name to the SDGs it has saved models for.
+    """
+    model_sdgs = {}
+    for sdg, model_name in registry.saved_models(ignore_models):
+        model_sdgs.setdefault(model_name, []).append(sdg)
+    return model_sdgs
+
+
+def load_multi_sdg_predictors(registry, model_sdgs):
+    """
+    Load a predictor that scores all SDGs at once for each model.
+
+    Models that provide a MultiSDGModel (e.g. rules models) are used directly, the
+    others are combined from their saved per-SDG models.
+
+    Parameters:
+    - registry (ModelRegistry): Registry to load the models from.
+    - model_sdgs (dict): Maps each model name to its SDGs (see `get_model_sdgs`).
+
+    Returns:
+    - dict: Maps each model name to its predictor, whose `predict_batch` returns
+        the prediction dicts of each SDG.
+    """
+    predictors = {}
+    for model_name, sdgs in model_sdgs.items():
+        multi_sdg_model = registry.get_multi_sdg_model(model_name)
+        if multi_sdg_model is not None:
+            predictors[model_name] = multi_sdg_model(sdgs)
+        else:
+            sdg_models = {sdg: registry.get_model(sdg, model_name) for sdg in sdgs}
+            predictors[model_name] = build_multi_sdg_predictor(sdg_models)
+    return predictors
+
+
+def score_multi_sdg(predictor, texts, model_hashes, prediction_cache, batch_size):
+    """
+    Score texts with a multi-SDG predictor, taking the predictions of texts that
+    every SDG has cached from the prediction cache.
+
+    Parameters:
+    - predictor: The multi-SDG predictor (see `load_multi_sdg_predictors`).
+    - texts (list[str]): Texts to score.
+    - model_hashes (dict): Maps each SDG of the predictor to the hash of its saved
+        model.
+    - prediction_cache (PredictionCache): None to score every text.
+    - batch_size (int): Number of texts scored at once.
+
+    Returns:
+    - dict: Maps each SDG to the prediction dict of each text.
+    """
+    sdg_predictions = {sdg: [None] * len(texts) for sdg in model_hashes}
+    missing = list(range(len(texts)))
+    if prediction_cache is not None:
+        keys = [text_hash(text) for text in texts]
+        for sdg, sdg_model_hash in model_hashes.items():
+            cached = prediction_cache.get_many(keys, sdg, sdg_model_hash)
+            for i, key in enumerate(keys):
+                sdg_predictions[sdg][i] = cached.get(key)
+        missing = [
+            i
+            for i in missing
+            if any(predictions[i] is None for predictions in sdg_predictions.values())
+        ]
+
+    for start in range(0, len(missing), batch_size):
+        batch = missing[start : start + batch_size]
+        with hook("predict_multi_sdg_batch", len(batch)):
+            batch_predictions = predictor.predict_batch([texts[i] for i in batch])
+        for sdg, predictions in batch_predictions.items():
+            for i, prediction in zip(batch, predictions):
+                sdg_predictions[sdg][i] = prediction
+            if prediction_cache is not None:
+                prediction_cache.put_many(
+                    {keys[i]: prediction for i, prediction in zip(batch, predictions)},
+                    sdg,
+                    model_hashes[sdg],
+                )
+    return sdg_predictions
+
+
+def predict_models_multi_sdg(
+    datatype,
+    ignore_models=[],
+    overwrite=True,
+    batch_size=1000,
+    include_text=True,
+    prediction_cache=None,
+):
+    """
+    Generate predictions for every saved model, scoring all SDGs of a model at once.
+
+    Each project's data is loaded once and every distinct text is scored once per
+    model type, with all of its SDG models sharing the preprocessing and
+    vectorization. Output files are the same as those of `predict_models`, and are
+    written and resumed in the same way.
+
+    Parameters:
+    - datatype (str): The datatype to predict on (e.g. "test", "raw").
+    - ignore_models (list[str]): Model names to skip.
+    - overwrite (bool): Whether to overwrite existing prediction files.
+    - batch_size (int): Number of texts scored, and rows written to disk, at once.
+    - include_text (bool): Whether to repeat each text in the prediction files.
+    - prediction_cache (PredictionCache): Cache to look up and save predictions in.
+        None for no cache.
+
+    Returns:
+    - int: Number of rows predicted.
+    """
+    for model_name in ignore_models:
+        print(f"Ignoring {model_name}")
+
+    n_rows = 0
+    registry = ModelRegistry()
+    model_sdgs = get_model_sdgs(registry, ignore_models)
+    predictors = load_multi_sdg_predictors(registry, model_sdgs)
+    model_hashes = {
+        model_name: {
+            sdg: model_hash(registry.model_paths[(sdg, model_name)]) for sdg in sdgs
+        }
+        for model_name, sdgs in model_sdgs.items()
+    }
+
+    all_sdgs = {sdg for sdgs in model_sdgs.values() for sdg in sdgs}
+
+    for project_name, sdg_data in iterdatatype_project_data(
+        datatype, all_sdgs, columns=["text"]
+    ):
+        unique_texts = pd.Index(
+            pd.unique(pd.concat([data["text"] for data in sdg_data.values()]))
+        )
+
+        for model_name, predictor in predictors.items():
+            writers = {}
+            for sdg in model_sdgs[model_name]:
+                if sdg not in sdg_data:
+                    continue
+                writer = open_prediction_writer(
+                    sdg, model_name, project_name, datatype, overwrite, include_text
+                )
+                if writer is not None:
+                    writers[sdg] = writer
+
+            # Predictions of each SDG by position in unique_texts, scored as the
+            # rows that need them are written
+            sdg_predictions = {sdg: {} for sdg in model_sdgs[model_name]}
+            while True:
+                chunks = {
+                    sdg: sdg_data[sdg]["text"].iloc[
+                        writer.completed_rows : writer.completed_rows + batch_size
+                    ]
+                    for sdg, writer in writers.items()
+                    if writer.completed_rows < len(sdg_data[sdg])
+                }
+                if len(chunks) == 0:
+                    break
+
+                positions = {
+                    sdg: unique_texts.get_indexer(chunk)
+                    for sdg, chunk in chunks.items()
+                }
+                # Every SDG of the model is scored together, so one SDG's
+                # predictions tell which texts are still missing
+                scored = sdg_predictions[next(iter(chunks))]
+                missing = sorted(
+                    {
+                        p
+                        for chunk_positions in positions.values()
+                        for p in chunk_positions
+                    }
+                    - scored.keys()
+                )
+                missing_predictions = score_multi_sdg(
+                    predictor,
+                    unique_texts[missing].tolist(),
+                    model_hashes[model_name],
+                    prediction_cache,
+                    batch_size,
+                )
+                for sdg, predictions in missing_predictions.items():
+                    sdg_predictions[sdg].update(zip(missing, predictions))
+
+                for sdg, chunk in chunks.items():
+                    predictions = [sdg_predictions[sdg][p] for p in positions[sdg]]
+                    writers[sdg].write(
+                        prediction_records(chunk, predictions, include_text)
+                    )
+                    n_rows += len(chunk)
+
+            for writer in writers.values():
+                writer.finish()
+    return n_rows
 
 
 def main():
@@ -0,0 +1,339 @@
+import sys
+
+sys.path.append(".")
+sys.path.append("./scripts")
+import json
+import queue
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import numpy as np
+from storage import to_json_value
+from model_registry import ModelRegistry
+from run_models import get_model_sdgs, load_multi_sdg_predictors
+
+# Number of recent requests the latency statistics are computed over
+LATENCY_WINDOW = 1000
+
+
+def score_texts(predictors, texts):
+    """
+    Score texts with every model.
+
+    Parameters:
+    - predictors (dict): Maps each model name to a predictor whose `predict_batch`
+        returns the prediction dicts of each SDG (see
+        `run_models.load_multi_sdg_predictors`).
+    - texts (list[str]): Texts to score.
+
+    Returns:
+    - list[dict]: For each text, maps each model name to its prediction dict (see
+        `TextAnalyticsFunctions.predict`) for every SDG.
+    """
+    model_predictions = {
+        model_name: predictor.predict_batch(texts)
+        for model_name, predictor in predictors.items()
+    }
+    return [
+        {
+            model_name: [sdg_predictions[i] for sdg_predictions in sdgs.values()]
+            for model_name, sdgs in model_predictions.items()
+        }
+        for i in range(len(texts))
+    ]
+
+
+def load_predictors(ignore_models=[]):
+    """
+    Load the multi-SDG predictor of every saved model.
+
+    Parameters:
+    - ignore_models (list[str]): Model names to leave out.
+
+    Returns:
+    - tuple: The predictor of each model name, and the SDGs of each model name.
+    """
+    # Every model is kept loaded, so the registry's memory cap doesn't apply
+    registry = ModelRegistry(max_bytes=None)
+    model_sdgs = get_model_sdgs(registry, ignore_models)
+    return load_multi_sdg_predictors(registry, model_sdgs), model_sdgs
+
+
+class ScoringRequest:
+    """Texts waiting to be scored, and their predictions once they are."""
+
+    def __init__(self, texts):
+        self.texts = texts
+        self.predictions = None
+        self.error = None
+        self.created = time.perf_counter()
+        self.done = threading.Event()
+
+
+class ScoringService:
+    """
+    Scores texts with models that stay loaded between requests.
+
+    Texts submitted from several threads at once are collected into micro-batches
+    of up to `max_batch_size` texts, waiting at most `max_wait` seconds for a batch
+    to fill, and each batch is scored with one `predict_batch` call per model.
+    """
+
+    def __init__(self, predictors, max_batch_size=256, max_wait=0.005):
+        """
+        Parameters:
+            - predictors (dict): Maps each model name to its predictor (see
+                `score_texts`).
+            - max_batch_size (int): Most texts scored in one batch. Larger requests
+                are scored as a batch of their own.
+            - max_wait (float): Seconds to wait for more requests before scoring a
+                batch that isn't full.
+        """
+        self.predictors = predictors
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.queue = queue.Queue()
+        self.thread = None
+        # Guards `running`, so that no request is queued after the stop sentinel
+        self.running_lock = threading.Lock()
+        self.running = False
+
+        self.stats_lock = threading.Lock()
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self.n_requests = 0
+        self.n_texts = 0
+        self.n_batches = 0
+        self.n_errors = 0
+
+    def start(self):
+        """Start scoring submitted texts in a background thread."""
+        with self.running_lock:
+            self.running = True
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """Score the texts already submitted, then stop the background thread."""
+        with self.running_lock:
+            if not self.running:
+                return
+            self.running = False
+            self.queue.put(None)
+        self.thread.join()
+
+    def predict(self, texts, timeout=None):
+        """
+        Score texts with every model, batched with other concurrent requests.
+
+        Parameters:
+            - texts (list[str]): Texts to score.
+            - timeout (float): Seconds to wait for the predictions. Waits
+                indefinitely by default.
+
+        Returns:
+            - list[dict]: The predictions of each text, see `score_texts`.
+
+        Raises:
+            - RuntimeError: If the service isn't running.
+            - TimeoutError: If the predictions took longer than `timeout`.
+        """
+        request = ScoringRequest(list(texts))
+        with self.running_lock:
+            if not self.running:
+                raise RuntimeError("The scoring service isn't running.")
+            self.queue.put(request)
+        if not request.done.wait(timeout):
+            raise TimeoutError("Timed out waiting for predictions.")
+        if request.error is not None:
+            raise request.error
+        return request.predictions
+
+    def run(self):
+        """Collect submitted requests into micro-batches and score them."""
+        stopping = False
+        while not stopping:
+            request = self.queue.get()
+            if request is None:
+                break
+            batch = [request]
+            n_texts = len(request.texts)
+
+            deadline = time.perf_counter() + self.max_wait
+            while n_texts < self.max_batch_size:
+                try:
+                    request = self.queue.get(
+                        timeout=max(0, deadline - time.perf_counter())
+                    )
+                except queue.Empty:
+                    break
+                if request is None:
+                    stopping = True
+                    break
+                batch.append(request)
+                n_texts += len(request.texts)
+
+            self.score_batch(batch)
+
+    def score_batch(self, batch):
+        """Score a micro-batch of requests and hand each request its predictions."""
+        texts = [text for request in batch for text in request.texts]
+        try:
+            predictions = score_texts(self.predictors, texts)
+        except Exception as error:
+            predictions = None
+            for request in batch:
+                request.error = error
+
+        start = 0
+        for request in batch:
+            if predictions is not None:
+                request.predictions = predictions[start : start + len(request.texts)]
+            start += len(request.texts)
+            request.done.set()
+
+        finished = time.perf_counter()
+        with self.stats_lock:
+            self.n_batches += 1
+            self.n_requests += len(batch)
+            self.n_texts += len(texts)
+            self.n_errors += len(batch) if predictions is None else 0
+            self.latencies.extend(finished - request.created for request in batch)
+
+    def stats(self):
+        """
+        Get the service's counters, queue depth and request latencies.
+
+        Returns:
+            - dict: Counts of scored requests, texts, batches and errors, the number
+                of requests waiting to be scored, and latency percentiles in
+                milliseconds over the last LATENCY_WINDOW requests.
+        """
+        with self.stats_lock:
+            latencies = np.array(self.latencies) * 1000
+            stats = dict(
+                requests=self.n_requests,
+                texts=self.n_texts,
+                batches=self.n_batches,
+                errors=self.n_errors,
+                mean_batch_size=self.n_texts / self.n_batches if self.n_batches else 0,
+            )
+        stats["queue_depth"] = self.queue.qsize()
+        stats["latency_ms"] = {
+            name: float(np.percentile(latencies, q)) if len(latencies) else None
+            for name, q in [("p50", 50), ("p95", 95), ("p99", 99), ("max", 100)]
+        }
+        return stats
+
+
+class ScoringRequestHandler(BaseHTTPRequestHandler):
+    """
+    Handles the requests of a ScoringServer:
+        - POST /predict with {"texts": [...]} returns {"predictions": [...]}, see
+            `ScoringService.predict`.
+        - GET /stats returns `ScoringService.stats`.
+        - GET /models returns the SDGs loaded for each model.
+    """
+
+    def do_GET(self):
+        if self.path == "/stats":
+            self.send_json(200, self.server.service.stats())
+        elif self.path == "/models":
+            self.send_json(200, self.server.model_sdgs)
+        else:
+            self.send_json(404, dict(error=f"Unknown path: {self.path}"))
+
+    def do_POST(self):
+        if self.path != "/predict":
+            self.send_json(404, dict(error=f"Unknown path: {self.path}"))
+            return
+
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            texts = json.loads(self.rfile.read(length))["texts"]
+            if not isinstance(texts, list) or not all(
+                isinstance(text, str) for text in texts
+            ):
+                raise ValueError
+        except (ValueError, KeyError, TypeError):
+            self.send_json(400, dict(error='Expected {"texts": [<str>, ...]}.'))
+            return
+
+        try:
+            predictions = self.server.service.predict(texts)
+        except Exception as error:
+            self.send_json(500, dict(error=f"{type(error).__name__}: {error}"))
+            return
+        self.send_json(200, dict(predictions=predictions))
+
+    def send_json(self, status, data):
+        body = json.dumps(data, default=to_json_value).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Request latencies are reported by /stats instead of per request logs
+        pass
+
+
+class ScoringServer(ThreadingHTTPServer):
+    """HTTP server for a ScoringService, handling each connection in a thread."""
+
+    daemon_threads = True
+
+    def __init__(self, address, service, model_sdgs):
+        """
+        Parameters:
+            - address (tuple): (host, port) to listen on. Port 0 picks a free port.
+            - service (ScoringService): The started service to score texts with.
+            - model_sdgs (dict): Maps each model name to its SDGs, for /models.
+        """
+        super().__init__(address, ScoringRequestHandler)
+        self.service = service
+        self.model_sdgs = model_sdgs
+
+
+def load_service(ignore_models=[], max_batch_size=256, max_wait=0.005):
+    """
+    Load every saved model and start a ScoringService for them.
+
+    Parameters:
+    - ignore_models (list[str]): Model names to leave out.
+    - max_batch_size (int): See `ScoringService`.
+    - max_wait (float): See `ScoringService`.
+
+    Returns:
+    - tuple: The started ScoringService and the SDGs of each model.
+    """
+    predictors, model_sdgs = load_predictors(ignore_models)
+    service = ScoringService(predictors, max_batch_size, max_wait)
+    service.start()
+    return service, model_sdgs
+
+
+def main(host="127.0.0.1", port=8000, ignore_models=[]):
+    """
+    Serve predictions of every saved model over HTTP until interrupted.
+
+    Parameters:
+    - host (str): Address to listen on. Only local clients by default.
+    - port (int): Port to listen on.
+    - ignore_models (list[str]): Model names to leave out.
+    """
+    service, model_sdgs = load_service(ignore_models)
+    server = ScoringServer((host, port), service, model_sdgs)
+    print(f"Scoring with {list(model_sdgs)} on http://{host}:{server.server_port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.stop()
+
+
+if __name__ == "__main__":
+    main()
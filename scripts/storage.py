@@ -0,0 +1,254 @@
+import json
+import os
+import shutil
+import numpy as np
+import pandas as pd
+
+# Parquet schema metadata key listing the columns stored as JSON strings
+JSON_COLUMNS_KEY = b"json_columns"
+
+
+class JsonlStorage:
+    """
+    Stores DataFrames as JSON lines, one record per row. Used for the doccano
+    exports and readable by the notebooks.
+    """
+
+    extension = ".jsonl"
+
+    def load(self, path, columns=None):
+        data = pd.read_json(path, lines=True)
+        if columns is not None:
+            data = data[columns]
+        return data
+
+    def save(self, data, path):
+        data.to_json(path, orient="records", lines=True)
+
+    def iter_chunks(self, path, chunksize, columns=None):
+        with pd.read_json(path, lines=True, chunksize=chunksize) as reader:
+            for data in reader:
+                if columns is not None:
+                    data = data[columns]
+                yield data.reset_index(drop=True)
+
+    def open_writer(self, path, json_columns=None):
+        return JsonlWriter(path)
+
+    def concat(self, paths, path):
+        with open(path, "wb") as file:
+            for part_path in paths:
+                with open(part_path, "rb") as part_file:
+                    shutil.copyfileobj(part_file, file)
+
+
+class JsonlWriter:
+    """Writes DataFrames to a JSON lines file chunk by chunk."""
+
+    def __init__(self, path):
+        self.file = open(path, "w")
+
+    def write(self, data):
+        if len(data) > 0:
+            lines = data.to_json(orient="records", lines=True)
+            self.file.write(lines if lines.endswith("\n") else lines + "\n")
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class ParquetStorage:
+    """
+    Stores DataFrames as Parquet files (requires pyarrow).
+
+    Scalar columns are stored natively, so reading a subset of columns (e.g. only
+    "text") skips the rest of the file. Columns of lists or dicts, like "labels",
+    "entities" or "prediction", are stored as JSON strings and decoded on load.
+    """
+
+    extension = ".parquet"
+
+    def load(self, path, columns=None):
+        import pyarrow.parquet as pq
+
+        table = pq.read_table(path, columns=columns)
+        metadata = table.schema.metadata or {}
+        json_columns = json.loads(metadata.get(JSON_COLUMNS_KEY, b"[]"))
+
+        data = table.to_pandas()
+        for column in json_columns:
+            if column in data.columns:
+                data[column] = data[column].map(from_json_string)
+        return data
+
+    def save(self, data, path):
+        with self.open_writer(path) as writer:
+            writer.write(data)
+
+    def iter_chunks(self, path, chunksize, columns=None):
+        import pyarrow.parquet as pq
+
+        parquet_file = pq.ParquetFile(path)
+        metadata = parquet_file.schema_arrow.metadata or {}
+        json_columns = json.loads(metadata.get(JSON_COLUMNS_KEY, b"[]"))
+        for batch in parquet_file.iter_batches(batch_size=chunksize, columns=columns):
+            data = batch.to_pandas()
+            for column in json_columns:
+                if column in data.columns:
+                    data[column] = data[column].map(from_json_string)
+            yield data
+
+    def open_writer(self, path, json_columns=None):
+        return ParquetWriter(path, json_columns)
+
+    def concat(self, paths, path):
+        import pyarrow.parquet as pq
+
+        if len(paths) == 0:
+            self.save(pd.DataFrame(), path)
+            return
+        schema = pq.read_schema(paths[0])
+        with pq.ParquetWriter(path, schema) as writer:
+            for part_path in paths:
+                writer.write_table(pq.read_table(part_path, schema=schema))
+
+
+class ParquetWriter:
+    """
+    Writes DataFrames to a Parquet file chunk by chunk, one row group per chunk.
+
+    The schema is taken from the first chunk. Columns of lists or dicts are stored
+    as nullable JSON strings: those declared in `json_columns`, those holding
+    lists or dicts in the first chunk, and those with only nulls in the first
+    chunk, whose type isn't known yet.
+    """
+
+    def __init__(self, path, json_columns=None):
+        """
+        Parameters:
+            - path (str): Path to the Parquet file.
+            - json_columns (list[str]): Columns to store as JSON strings, on top of
+                those detected from the first chunk.
+        """
+        self.path = path
+        self.writer = None
+        self.json_columns = list(json_columns or [])
+
+    def write(self, data):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        data = data.reset_index(drop=True)
+        if self.writer is None:
+            self.json_columns += [
+                column
+                for column in data.columns
+                if column not in self.json_columns
+                and (is_nested(data[column]) or data[column].isna().all())
+            ]
+        else:
+            for column in data.columns:
+                if column not in self.json_columns and is_nested(data[column]):
+                    raise ValueError(
+                        f"Column '{column}' holds lists or dicts, but didn't in the "
+                        "first chunk. Declare it in json_columns."
+                    )
+        for column in self.json_columns:
+            if column in data.columns:
+                data[column] = data[column].map(to_json_string)
+
+        if self.writer is None:
+            schema = pa.Schema.from_pandas(data, preserve_index=False)
+            fields = [
+                (
+                    field.with_type(pa.string())
+                    if field.name in self.json_columns
+                    else field
+                )
+                for field in schema
+            ]
+            metadata = dict(schema.metadata or {})
+            metadata[JSON_COLUMNS_KEY] = json.dumps(self.json_columns).encode()
+            schema = pa.schema(fields, metadata=metadata)
+            self.writer = pq.ParquetWriter(self.path, schema)
+        table = pa.Table.from_pandas(
+            data, schema=self.writer.schema, preserve_index=False
+        )
+        self.writer.write_table(table)
+
+    def close(self):
+        if self.writer is None:
+            # Nothing was written, leave an empty file behind
+            self.write(pd.DataFrame())
+        self.writer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def is_nested(column):
+    """Check if a column holds lists or dicts."""
+    if column.dtype != object:
+        return False
+    values = column.dropna()
+    return len(values) > 0 and isinstance(
+        values.iloc[0], (list, tuple, dict, np.ndarray)
+    )
+
+
+def to_json_string(value):
+    """Encode a value of a JSON column, keeping nulls as nulls."""
+    if value is None or (isinstance(value, float) and np.isnan(value)):
+        return None
+    return json.dumps(value, default=to_json_value)
+
+
+def from_json_string(value):
+    """Decode a value of a JSON column, see `to_json_string`. Nulls may be NaN."""
+    return json.loads(value) if isinstance(value, str) else None
+
+
+def to_json_value(value):
+    """Convert numpy values that `json.dumps` can't serialize."""
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+STORAGE_BACKENDS = {
+    "jsonl": JsonlStorage(),
+    "parquet": ParquetStorage(),
+}
+
+
+def get_storage(path):
+    """
+    Get the storage backend for a file, based on its extension.
+
+    Parameters:
+    - path (str): Path to the data file.
+
+    Returns:
+    - JsonlStorage or ParquetStorage: The backend to read and write the file with.
+
+    Raises:
+    - ValueError: If no backend handles the file's extension.
+    """
+    extension = os.path.splitext(path)[1]
+    for storage in STORAGE_BACKENDS.values():
+        if storage.extension == extension:
+            return storage
+    raise ValueError(
+        f"Unsupported data file: {path}. Supported formats are {list(STORAGE_BACKENDS)}."
+    )
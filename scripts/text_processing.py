@@ -0,0 +1,185 @@
+from functools import lru_cache
+import hashlib
+import json
+import os
+import nltk
+from nltk.stem import PorterStemmer
+from nltk.corpus import stopwords
+
+STEM_CACHE_SIZE = 100_000
+
+# Stopword sets per language, loaded on first use
+STOP_WORDS = {}
+
+
+def get_stop_words(language="english"):
+    """
+    Get the NLTK stopword set for a language, loading it once per process.
+
+    Parameters:
+    - language (str): Language of the stopword list.
+
+    Returns:
+    - set: The stopwords.
+    """
+    if language not in STOP_WORDS:
+        STOP_WORDS[language] = set(stopwords.words(language))
+    return STOP_WORDS[language]
+
+
+class TextNormalizer:
+    """
+    Tokenizes text, removes stopwords and stems the remaining tokens.
+
+    Stems are memoized in an LRU cache since outlines reuse a small vocabulary.
+    Use `get_normalizer()` to share a single instance within a process.
+    """
+
+    def __init__(self, language="english", stem_cache_size=STEM_CACHE_SIZE):
+        """
+        Parameters:
+            - language (str): Language of the stopword list.
+            - stem_cache_size (int): Maximum number of stems kept in the cache.
+        """
+        self.language = language
+        self.stop_words = get_stop_words(language)
+        self.stemmer = PorterStemmer()
+        self.stem = lru_cache(maxsize=stem_cache_size)(self.stemmer.stem)
+
+    def normalize(self, text):
+        """
+        Normalize a single text.
+
+        Parameters:
+            - text (str): Text to normalize.
+
+        Returns:
+            - str: Space separated stemmed tokens, without stopwords.
+        """
+        # Tokenization
+        words = nltk.word_tokenize(text)
+
+        # Remove stopwords
+        words = [word for word in words if word.lower() not in self.stop_words]
+
+        # Stemming
+        words = [self.stem(word) for word in words]
+
+        return " ".join(words)
+
+    def normalize_all(self, text_list):
+        """
+        Normalize a list of texts.
+
+        Parameters:
+            - text_list (list[str]): Texts to normalize.
+
+        Returns:
+            - list[str]: The normalized texts.
+        """
+        return [self.normalize(text) for text in text_list]
+
+    def config_key(self):
+        """
+        Get a hash identifying the normalization settings.
+
+        Returns:
+            - str: Hash of the tokenizer, stopwords and stemmer used.
+        """
+        config = dict(
+            tokenizer="word_tokenize",
+            stemmer=type(self.stemmer).__name__,
+            language=self.language,
+            stop_words=sorted(self.stop_words),
+        )
+        return hashlib.sha1(json.dumps(config).encode()).hexdigest()
+
+    def cache_info(self):
+        """
+        Get statistics about the stem cache.
+
+        Returns:
+            - functools._CacheInfo: Named tuple of hits, misses, maxsize and currsize.
+        """
+        return self.stem.cache_info()
+
+
+# Normalizers per language, built on first use
+NORMALIZERS = {}
+
+
+def get_normalizer(language="english"):
+    """
+    Get the process-wide TextNormalizer for a language.
+
+    Parameters:
+    - language (str): Language of the stopword list.
+
+    Returns:
+    - TextNormalizer: The shared normalizer.
+    """
+    if language not in NORMALIZERS:
+        NORMALIZERS[language] = TextNormalizer(language)
+    return NORMALIZERS[language]
+
+
+class TokenCache:
+    """
+    Persistent store of normalized texts, keyed by a hash of the source text and
+    the normalizer config.
+
+    Texts that are already in the store are not normalized again, so a project's
+    texts only need to be tokenized and stemmed once across training runs.
+    """
+
+    def __init__(self, path, normalizer=None):
+        """
+        Parameters:
+            - path (str): JSONL file the normalized texts are stored in.
+            - normalizer (TextNormalizer): Normalizer used for texts that aren't
+                stored yet. Defaults to the process-wide normalizer.
+        """
+        self.path = path
+        self.normalizer = normalizer or get_normalizer()
+        self.config_key = self.normalizer.config_key()
+        self.tokens = {}
+        self.updated = False
+
+        if os.path.exists(path):
+            with open(path) as file:
+                for line in file:
+                    row = json.loads(line)
+                    self.tokens[row["key"]] = row["tokens"]
+
+    def key(self, text):
+        """Hash of a text and the normalizer config."""
+        return hashlib.sha1(f"{self.config_key}\n{text}".encode()).hexdigest()
+
+    def normalize_all(self, text_list):
+        """
+        Normalize a list of texts, reusing stored results where possible.
+
+        Parameters:
+            - text_list (list[str]): Texts to normalize.
+
+        Returns:
+            - list[str]: The normalized texts.
+        """
+        normalized_texts = []
+        for text in text_list:
+            key = self.key(text)
+            if key not in self.tokens:
+                self.tokens[key] = self.normalizer.normalize(text)
+                self.updated = True
+            normalized_texts.append(self.tokens[key])
+        return normalized_texts
+
+    def save(self):
+        """Write the store to disk if any texts were added."""
+        if not self.updated:
+            return
+
+        with open(self.path, "w") as file:
+            for key, tokens in self.tokens.items():
+                file.write(json.dumps(dict(key=key, tokens=tokens)) + "\n")
+        self.updated = False
@@ -21,24 +21,33 @@ DOCCANO_EXPORT_DIRS = PREPARE_DATA_PATH("doccano_export/*")
 # Location data is generated
 ############################
 
+# File format of generated data, see `storage.py` ("jsonl" or "parquet")
+DATA_FORMAT = os.environ.get("SDG_DATA_FORMAT", "jsonl")
+
 # Points to combined doccano export paths
 RAW_TEMPLATE = lambda sdg=False, project_name="*": PREPARE_DATA_PATH(
-    f"raw/{project_name}.jsonl"
+    f"raw/{project_name}.{DATA_FORMAT}"
 )
 
-# Points to train, dev, test, traindev paths
+# Points to train, dev, test, traindev paths. Splits are stored as the row
+# positions of their outlines in the project's raw data (see `file_org.load_split`)
 TEST_TEMPLATE = lambda sdg="*", project_name="*": PREPARE_DATA_PATH(
-    f"processed/{sdg}_{project_name}__test.jsonl"
+    f"processed/{sdg}_{project_name}__test.npy"
 )
 TRAIN_TEMPLATE = lambda sdg="*", project_name="*": PREPARE_DATA_PATH(
-    f"processed/{sdg}_{project_name}__train.jsonl"
+    f"processed/{sdg}_{project_name}__train.npy"
 )
 TRAINDEV_TEMPLATE = lambda sdg="*", project_name="*": PREPARE_DATA_PATH(
-    f"processed/{sdg}_{project_name}__traindev.jsonl"
+    f"processed/{sdg}_{project_name}__traindev.npy"
 )
 DEV_TEMPLATE = lambda sdg="*", project_name="*": PREPARE_DATA_PATH(
-    f"processed/{sdg}_{project_name}__dev.jsonl"
+    f"processed/{sdg}_{project_name}__dev.npy"
+)
+# Points to normalized text of each project, shared by all SDGs
+TOKENS_TEMPLATE = lambda project_name="*": PREPARE_DATA_PATH(
+    f"processed/{project_name}__tokens.jsonl"
 )
+
 # Paths that use "project_name"
 PROJECTNAME_DATA_PATHS = {
     "raw": RAW_TEMPLATE,
@@ -52,25 +61,54 @@ PROJECTNAME_DATA_PATHS = {
 MODEL_TEMPLATE = lambda sdg="*", model_name="*": PREPARE_DATA_PATH(
     f"trained_models/{sdg}-{model_name}.dill"
 )
-GET_MODEL_DETAILS = lambda filename: filename.replace(".dill", "").split("-")
+# Model artifacts, see `model_artifacts.py`
+ARTIFACT_TEMPLATE = lambda sdg="*", model_name="*": PREPARE_DATA_PATH(
+    f"trained_models/{sdg}-{model_name}.artifact"
+)
+GET_MODEL_DETAILS = lambda filename: os.path.splitext(filename)[0].split("-")
+# Memory cap of the models loaded at once, see `model_registry.py`
+MODEL_CACHE_BYTES_LIMIT = 2 * 1024**3
 
 # Prediction paths
 PREDICTIONS_TEMPLATE = (
     lambda sdg="*", model_name="*", project_name="*", datatype="*": PREPARE_DATA_PATH(
-        f"predictions/{sdg}-{model_name}-{project_name}-{datatype}__predictions.jsonl"
+        f"predictions/{sdg}-{model_name}-{project_name}-{datatype}__predictions.{DATA_FORMAT}"
     )
 )
-GET_PREDICTION_DETAILS = lambda filename: filename.replace(
-    "__predictions.jsonl", ""
-).split("-")
+GET_PREDICTION_DETAILS = lambda filename: (
+    os.path.splitext(filename)[0].replace("__predictions", "").split("-")
+)
 # Paths that use "sdg-model_name"
 SDGMODEL_DATA_PATHS = {
     "models": MODEL_TEMPLATE,
     "predictions": PREDICTIONS_TEMPLATE,
 }
 
+# On-disk cache of fitted pipeline transformers shared across grid search fits
+VECTORIZER_CACHE_DIR = PREPARE_DATA_PATH("cache/vectorizers")
+VECTORIZER_CACHE_BYTES_LIMIT = "2G"
+
+# Predictions of each text, SDG and saved model, reused across prediction runs
+PREDICTION_CACHE_PATH = PREPARE_DATA_PATH("cache/predictions.sqlite")
+PREDICTION_CACHE_BYTES_LIMIT = 1024**3
+
+# Keyword dictionary used by the rules models, and the cache of its parsed form
+UOFT_KEYWORDS_PATH = os.path.join(
+    current_dir, "..", "models", "resources", "uoft_sdg_keywords.xlsx"
+)
+KEYWORDS_CACHE_DIR = PREPARE_DATA_PATH("cache/keywords")
+
+# Fingerprints of the doccano exports each project was prepared from
+PREPARE_MANIFEST_PATH = PREPARE_DATA_PATH("prepare_manifest.json")
+
 # Aggregated performance path
 ALL_EVAL_RESULTS_PATH = PREPARE_DATA_PATH("all_eval_results.jsonl")
+# Hashes and metrics of evaluated prediction files, for incremental evaluation
+EVAL_MANIFEST_PATH = PREPARE_DATA_PATH("eval_manifest.json")
+# Metrics of the pipeline stages, one JSON record per line (see instrumentation.py)
+METRICS_PATH = PREPARE_DATA_PATH("metrics.jsonl")
+# Profiles of the stages selected with the SDG_PROFILE environment variable
+PROFILES_DIR = PREPARE_DATA_PATH("profiles")
 
 ##################
 # DATA VARIABLES #
@@ -95,6 +133,9 @@ REQUIRED_COLS = [
     "cats",
     "entities",
 ]
+# Columns of lists in the raw data, stored as JSON in Parquet files whatever the
+# first chunk written holds
+RAW_LIST_COLS = ["cats", "entities", "labels"]
 
 SDG_MAP = {
     "SDG 1": "1 - No Poverty",
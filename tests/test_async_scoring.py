@@ -0,0 +1,74 @@
+import asyncio
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+from scripts.async_scoring import AsyncScorer
+
+
+def score_upper(texts):
+    return [dict(text=text.upper(), batch_size=len(texts)) for text in texts]
+
+
+def score_error(texts):
+    raise ValueError("Scoring failed.")
+
+
+class TestAsyncScorer(unittest.TestCase):
+    def setUp(self):
+        self.executor = ProcessPoolExecutor(max_workers=2)
+
+    def tearDown(self):
+        self.executor.shutdown()
+
+    def test_coalescing(self):
+        scorer = AsyncScorer(score_upper, self.executor, batch_window=0.05)
+        texts = ["water", "poverty", "water", "water", "climate", "poverty"]
+        predictions = asyncio.run(scorer.predict_batch(texts))
+
+        # Identical texts are scored once, all distinct texts in one batch
+        self.assertEqual(
+            [prediction["text"] for prediction in predictions],
+            [text.upper() for text in texts],
+        )
+        self.assertEqual({prediction["batch_size"] for prediction in predictions}, {3})
+        self.assertEqual(
+            scorer.stats(),
+            dict(requests=6, coalesced=3, batches=1, scored=3, in_flight=0),
+        )
+
+    def test_max_batch_size(self):
+        scorer = AsyncScorer(
+            score_upper, self.executor, batch_window=10, max_batch_size=2
+        )
+        texts = ["a", "b", "c", "d"]
+        predictions = asyncio.run(scorer.predict_batch(texts))
+        self.assertEqual(
+            [prediction["batch_size"] for prediction in predictions], [2] * 4
+        )
+
+    def test_error(self):
+        scorer = AsyncScorer(score_error, self.executor)
+        with self.assertRaises(ValueError):
+            asyncio.run(scorer.predict_batch(["water", "water"]))
+        self.assertEqual(scorer.stats()["in_flight"], 0)
+
+    def test_cancelled(self):
+        scorer = AsyncScorer(score_upper, self.executor)
+
+        async def resolve_cancelled():
+            loop = asyncio.get_running_loop()
+            waiting = {"water": loop.create_future(), "poverty": loop.create_future()}
+            scorer.in_flight.update(waiting)
+            # Already cancelled, e.g. while the event loop shuts down
+            waiting["poverty"].cancel()
+            scoring = loop.create_future()
+            scoring.cancel()
+            scorer.resolve({"water": "water", "poverty": "poverty"}, scoring)
+            return waiting
+
+        waiting = asyncio.run(resolve_cancelled())
+        self.assertTrue(all(future.cancelled() for future in waiting.values()))
+        self.assertEqual(scorer.stats()["in_flight"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,34 @@
+import unittest
+from scripts.base_model import TextAnalyticsFunctions
+
+
+class KeywordModel(TextAnalyticsFunctions):
+    def __init__(self, sdg):
+        super().__init__(sdg)
+        self.model_type = "rules"
+
+    def predict_rules_model(self, text):
+        prediction = int("poverty" in text)
+        return prediction, {"length": len(text)}
+
+
+class TestPredictBatch(unittest.TestCase):
+    def setUp(self):
+        self.model = KeywordModel("SDG 1")
+        self.model.train([], [])
+        self.texts = ["ending poverty", "a course on databases", ""]
+
+    def test_matches_predict(self):
+        expected = [self.model.predict(text) for text in self.texts]
+        self.assertEqual(self.model.predict_batch(self.texts), expected)
+
+    def test_empty_batch(self):
+        self.assertEqual(self.model.predict_batch([]), [])
+
+    def test_untrained_model(self):
+        with self.assertRaises(ValueError):
+            KeywordModel("SDG 1").predict_batch(self.texts)
+
+
+if __name__ == "__main__":
+    unittest.main()
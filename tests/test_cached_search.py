@@ -0,0 +1,87 @@
+import contextlib
+import io
+import tempfile
+import unittest
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.linear_model import LogisticRegression
+from sklearn.model_selection import StratifiedKFold
+from sklearn.pipeline import Pipeline
+from scripts.cached_search import cached_grid_search, reduce_vectorizer_cache
+
+
+class CountingVectorizer(TfidfVectorizer):
+    fits = 0
+
+    def fit_transform(self, raw_documents, y=None):
+        CountingVectorizer.fits += 1
+        return super().fit_transform(raw_documents, y)
+
+
+class TestCachedGridSearch(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        CountingVectorizer.fits = 0
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def search(self, n_jobs=1):
+        text = [f"clean water {i}" for i in range(6)] + [
+            f"ending poverty {i}" for i in range(6)
+        ]
+        labels = [1] * 6 + [0] * 6
+        pipeline = Pipeline(
+            [("tfidf", CountingVectorizer()), ("classifier", LogisticRegression())]
+        )
+        hyperparameters = {
+            "tfidf__max_features": [5, 10],
+            "classifier__C": [0.1, 1, 10],
+        }
+        cv = StratifiedKFold(n_splits=2, shuffle=True, random_state=1)
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            cached_grid_search(
+                pipeline,
+                hyperparameters,
+                cv,
+                text,
+                labels,
+                n_jobs=n_jobs,
+                cache_dir=self.tmp_dir.name,
+            )
+        return output.getvalue()
+
+    def test_vectorizer_reused(self):
+        output = self.search()
+
+        # One fit per vectorizer setting and fold, whatever the classifier's C,
+        # and one more for the refit on all of the data
+        self.assertEqual(CountingVectorizer.fits, 2 * 2 + 1)
+        # 2 * 3 candidates * 2 folds, and the refit
+        self.assertIn("Grid search: 12 fits", output)
+        self.assertIn("8 of 13 vectorizer fits saved by caching", output)
+
+        # Every fit is in the cache for the next search
+        output = self.search()
+        self.assertEqual(CountingVectorizer.fits, 2 * 2 + 1)
+        self.assertIn("13 of 13 vectorizer fits saved by caching", output)
+
+    def test_parallel_workers_counted(self):
+        # Fits in the worker processes aren't seen by CountingVectorizer, but are
+        # still counted in the report
+        output = self.search(n_jobs=2)
+        self.assertRegex(output, r"\d+ of 13 vectorizer fits saved by caching")
+        output = self.search(n_jobs=2)
+        self.assertIn("13 of 13 vectorizer fits saved by caching", output)
+
+    def test_reduce_cache(self):
+        self.search()
+        reduce_vectorizer_cache(self.tmp_dir.name, bytes_limit=0)
+        # Nothing is left from the first search
+        output = self.search()
+        self.assertEqual(CountingVectorizer.fits, 2 * (2 * 2 + 1))
+        self.assertIn("8 of 13 vectorizer fits saved by caching", output)
+
+
+if __name__ == "__main__":
+    unittest.main()
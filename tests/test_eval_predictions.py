@@ -0,0 +1,141 @@
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+from unittest import mock
+import pandas as pd
+from scripts import eval_predictions
+from scripts.eval_predictions import (
+    compare_all,
+    count_comparisons,
+    get_original_labels,
+)
+from scripts.file_org import write_data
+from scripts.instrumentation import METRICS_PATH_ENV
+
+
+def compare_rows(predicted_labels, indices, original_data, sdg):
+    """Count the comparisons one row at a time, as eval did before vectorizing."""
+    counts = dict(TP=0, FP=0, TN=0, FN=0)
+    for pred, index in zip(predicted_labels, indices):
+        ori = int(sdg in original_data.loc[index]["labels"])
+        if pred == 1 and ori == 1:
+            counts["TP"] += 1
+        elif pred == 1 and ori == 0:
+            counts["FP"] += 1
+        elif pred == 0 and ori == 1:
+            counts["FN"] += 1
+        elif pred == 0 and ori == 0:
+            counts["TN"] += 1
+    return counts
+
+
+class TestEvalPredictions(unittest.TestCase):
+    def test_same_as_per_row(self):
+        original_data = pd.DataFrame(
+            {
+                "labels": [
+                    ["SDG 1"],
+                    [],
+                    ["SDG 6", "SDG 1"],
+                    ["SDG 6"],
+                    ["SDG 13"],
+                    [],
+                ]
+            }
+        )
+        # Rows in any order and repeated, and a prediction that isn't 1/0
+        indices = [3, 0, 5, 2, 2, 1, 4, 0]
+        predicted_labels = [1, 0, 1, 0, 1, None, 0, 1]
+
+        for sdg in ["SDG 1", "SDG 6", "SDG 13", "SDG 7"]:
+            original_labels = get_original_labels(original_data, sdg, indices)
+            counts = count_comparisons(compare_all(predicted_labels, original_labels))
+            self.assertEqual(
+                {comparison: int(count) for comparison, count in counts.items()},
+                compare_rows(predicted_labels, indices, original_data, sdg),
+            )
+
+
+class TestIncrementalEval(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        tmp_path = lambda name: os.path.join(self.tmp_dir.name, name)
+        original_path = tmp_path("original.jsonl")
+        write_data(pd.DataFrame({"labels": [["SDG 1"], [], ["SDG 6"]]}), original_path)
+        for model_name, predicted in [("b_model", [1, 1, 0]), ("a_model", [1, 0, 1])]:
+            for sdg in ["SDG 6", "SDG 1"]:
+                predictions = pd.DataFrame(
+                    {
+                        "index": [0, 1, 2],
+                        "prediction": [
+                            dict(category=sdg, prediction=p, metadata={})
+                            for p in predicted
+                        ],
+                    }
+                )
+                write_data(
+                    predictions,
+                    tmp_path(f"{sdg}-{model_name}-tiny-test__predictions.jsonl"),
+                )
+
+        manifest_path = tmp_path("eval_manifest.json")
+        load_eval_manifest = eval_predictions.load_eval_manifest
+        save_eval_manifest = eval_predictions.save_eval_manifest
+        patches = dict(
+            PREDICTIONS_TEMPLATE=lambda: tmp_path("*__predictions.jsonl"),
+            get_original_path=lambda prediction_path: original_path,
+            ALL_EVAL_RESULTS_PATH=tmp_path("all_eval_results.jsonl"),
+            load_eval_manifest=lambda: load_eval_manifest(manifest_path),
+            save_eval_manifest=lambda manifest: save_eval_manifest(
+                manifest, manifest_path
+            ),
+        )
+        self.patches = [
+            mock.patch.object(eval_predictions, name, value)
+            for name, value in patches.items()
+        ]
+        self.patches.append(mock.patch.dict(os.environ, {METRICS_PATH_ENV: ""}))
+        for patch in self.patches:
+            patch.start()
+        self.results_path = patches["ALL_EVAL_RESULTS_PATH"]
+
+    def tearDown(self):
+        for patch in self.patches:
+            patch.stop()
+        self.tmp_dir.cleanup()
+
+    def evaluate(self):
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            eval_predictions.eval_predictions(max_workers=2, incremental=True)
+        with open(self.results_path, "rb") as file:
+            return output.getvalue(), file.read()
+
+    def test_incremental(self):
+        output, results = self.evaluate()
+        self.assertIn("Evaluating 4 of 4 prediction files", output)
+        # Ordered by prediction file path
+        data = pd.read_json(io.BytesIO(results), lines=True)
+        self.assertEqual(
+            list(zip(data["model_name"], data["sdg"])),
+            [
+                ("a_model", "SDG 1"),
+                ("b_model", "SDG 1"),
+                ("a_model", "SDG 6"),
+                ("b_model", "SDG 6"),
+            ],
+        )
+        self.assertEqual(data["TP"].tolist(), [1, 1, 1, 0])
+
+        # No worker processes are started when there is nothing to evaluate
+        with mock.patch.object(eval_predictions, "ProcessPoolExecutor") as pool:
+            output, second_results = self.evaluate()
+        pool.assert_not_called()
+        self.assertIn("Evaluating 0 of 4 prediction files", output)
+        self.assertEqual(second_results, results)
+
+
+if __name__ == "__main__":
+    unittest.main()
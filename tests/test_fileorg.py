@@ -1,13 +1,19 @@
 import os
 import pandas as pd
 import unittest
+from unittest import mock
+from scripts import file_org
 from scripts.file_org import (
     get_project_name,
     get_file_path,
     get_project_mappings,
     get_all_project_names,
+    load_data,
+    save_data,
+    save_split,
 )
 from scripts.file_org import PROJECTNAME_DATA_PATHS
+from scripts.label_matrix import encode_labels, pack_labels
 
 
 class TestFileOrg(unittest.TestCase):
@@ -65,5 +71,49 @@ class TestFileOrg(unittest.TestCase):
         self.assertTrue(set(result).issuperset(expected))
 
 
+class TestSplits(unittest.TestCase):
+    def setUp(self):
+        self.project_name = "test_split_project"
+        self.raw_data = pd.DataFrame(
+            {
+                "text": ["a", "b", "c", "d"],
+                "labels": [["SDG 1"], [], ["SDG 1", "SDG 2"], ["SDG 2"]],
+            }
+        )
+        self.raw_data["label_bits"] = pack_labels(
+            encode_labels(self.raw_data["labels"])
+        )
+        save_data(self.raw_data, "raw", self.project_name, False)
+        save_split([2, 0], "test", self.project_name, "SDG 1")
+
+    def tearDown(self):
+        os.remove(get_file_path("raw", self.project_name))
+        os.remove(get_file_path("test", self.project_name, "SDG 1"))
+
+    def test_load_split(self):
+        data = load_data(get_file_path("test", self.project_name, "SDG 1"))
+        self.assertEqual(data["text"].tolist(), ["c", "a"])
+        self.assertEqual(data["train_label"].tolist(), [1, 1])
+        self.assertEqual(data.index.tolist(), [0, 1])
+
+    def test_load_split_columns(self):
+        path = get_file_path("test", self.project_name, "SDG 1")
+        data = load_data(path, columns=["text", "train_label"])
+        self.assertEqual(list(data.columns), ["text", "train_label"])
+
+    def test_raw_data_cache_bounded(self):
+        raw_path = get_file_path("raw", self.project_name)
+        with mock.patch.dict(file_org.RAW_DATA_CACHE, clear=True), mock.patch.object(
+            file_org, "RAW_DATA_CACHE_SIZE", 2
+        ):
+            for columns in [["text"], ["labels"], ["text"], ["label_bits"]]:
+                file_org.load_raw_data(self.project_name, columns)
+            # The least recently used table is dropped
+            self.assertEqual(
+                list(file_org.RAW_DATA_CACHE),
+                [(raw_path, ("text",)), (raw_path, ("label_bits",))],
+            )
+
+
 if __name__ == "__main__":
     unittest.main()
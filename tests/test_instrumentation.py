@@ -0,0 +1,57 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+from scripts.instrumentation import stage, hook, METRICS_PATH_ENV, PROFILE_ENV
+
+
+class TestInstrumentation(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, "metrics.jsonl")
+        self.env = mock.patch.dict(
+            os.environ, {METRICS_PATH_ENV: self.path, PROFILE_ENV: ""}
+        )
+        self.env.start()
+
+    def tearDown(self):
+        self.env.stop()
+        self.tmp_dir.cleanup()
+
+    def load_records(self):
+        with open(self.path) as file:
+            return [json.loads(line) for line in file]
+
+    def test_stage(self):
+        with stage("outer", model_name="model-a") as record:
+            with hook("preprocess_text", 10):
+                pass
+            with stage("inner", rows=5):
+                with hook("preprocess_text", 5):
+                    pass
+            record["rows"] = 10
+        # Hooks outside of a stage aren't recorded
+        with hook("preprocess_text", 10):
+            pass
+
+        inner, outer = self.load_records()
+        self.assertEqual(inner["stage"], "inner")
+        self.assertEqual(inner["hooks"]["preprocess_text"]["rows"], 5)
+        self.assertEqual(outer["model_name"], "model-a")
+        self.assertEqual(outer["rows"], 10)
+        self.assertEqual(outer["status"], "ok")
+        self.assertEqual(outer["hooks"]["preprocess_text"]["calls"], 1)
+        self.assertGreaterEqual(outer["wall_seconds"], inner["wall_seconds"])
+
+    def test_error(self):
+        with self.assertRaises(ValueError):
+            with stage("failing"):
+                raise ValueError("Stage failed.")
+        (record,) = self.load_records()
+        self.assertEqual(record["status"], "error")
+        self.assertIsNone(record["rows_per_second"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+import re
+import unittest
+from scripts.keyword_matcher import KeywordMatcher, MultiSDGKeywordMatcher
+
+
+class TestKeywordMatcher(unittest.TestCase):
+    def setUp(self):
+        self.keywords = [
+            "poverty",
+            "income distribution",
+            "agricultur*",
+            "access and benefit sharing (ABS)",
+            "LGBTQ*",
+            "CO2",
+        ]
+        self.matcher = KeywordMatcher(self.keywords)
+        self.texts = [
+            "Poverty and income distribution in agricultural economies.",
+            "poverty, sub-poverty and xpoverty",
+            "LGBTQ+ students and CO2 emissions",
+            "access and benefit sharing ABS agreements",
+            "",
+        ]
+
+    def test_same_matches_as_regex_search(self):
+        for text in self.texts:
+            expected = [k for k in self.keywords if re.search(rf"\b{k}", text)]
+            keyword_matches, _ = self.matcher.match(text)
+            self.assertEqual(keyword_matches, expected)
+
+    def test_spans(self):
+        text = "poverty, sub-poverty and agricultural income distribution"
+        _, spans = self.matcher.match(text)
+        self.assertEqual(
+            spans,
+            [
+                [0, 7, "poverty"],
+                [13, 20, "poverty"],
+                [25, 35, "agricultur*"],
+                [38, 57, "income distribution"],
+            ],
+        )
+
+    def test_no_keywords(self):
+        self.assertEqual(KeywordMatcher([]).match("poverty"), ([], []))
+
+
+class TestMultiSDGKeywordMatcher(unittest.TestCase):
+    def setUp(self):
+        self.dictionary = {
+            "SDG 1": ["poverty", "affordab*"],
+            "SDG 10": ["inequalit*", "affordab*"],
+            "SDG 13": ["climate"],
+        }
+        self.matcher = MultiSDGKeywordMatcher(self.dictionary)
+
+    def test_same_matches_as_single_sdg(self):
+        text = "Affordable housing, affordability and inequality: poverty in cities"
+        results = self.matcher.match(text)
+        self.assertEqual(set(results), set(self.dictionary))
+        for sdg, keywords in self.dictionary.items():
+            self.assertEqual(results[sdg], KeywordMatcher(keywords).match(text))
+
+
+if __name__ == "__main__":
+    unittest.main()
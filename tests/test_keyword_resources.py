@@ -0,0 +1,79 @@
+import importlib.util
+import os
+import tempfile
+import unittest
+from unittest import mock
+import pandas as pd
+from scripts import keyword_resources
+from scripts.keyword_resources import load_keywords
+
+HAS_OPENPYXL = importlib.util.find_spec("openpyxl") is not None
+
+
+def write_keywords(path, keywords):
+    pd.DataFrame(
+        {"SDG": list(keywords), "Keywords": [", ".join(k) for k in keywords.values()]}
+    ).to_excel(path, index=False)
+
+
+@unittest.skipUnless(HAS_OPENPYXL, "openpyxl is not installed")
+class TestLoadKeywords(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, "keywords.xlsx")
+        self.cache_dir = os.path.join(self.tmp_dir.name, "cache")
+        write_keywords(self.path, {"SDG 1": ["poverty", "income"], "SDG 6": ["water"]})
+
+        parse_keywords = keyword_resources.parse_keywords
+        self.parse = mock.Mock(side_effect=parse_keywords)
+        self.patches = [
+            mock.patch.object(keyword_resources, "parse_keywords", self.parse),
+            mock.patch.dict(keyword_resources.KEYWORD_DICTS, clear=True),
+        ]
+        for patch in self.patches:
+            patch.start()
+
+    def tearDown(self):
+        for patch in self.patches:
+            patch.stop()
+        self.tmp_dir.cleanup()
+
+    def load(self):
+        return load_keywords(self.path, self.cache_dir)
+
+    def test_memo(self):
+        keywords = self.load()
+        self.assertEqual(keywords, {"SDG 1": ["poverty", "income"], "SDG 6": ["water"]})
+        self.assertIs(self.load(), keywords)
+        self.assertEqual(self.parse.call_count, 1)
+
+    def test_disk_cache_reused(self):
+        keywords = self.load()
+        self.assertEqual(len(os.listdir(self.cache_dir)), 1)
+
+        # A new process only has the on-disk cache
+        keyword_resources.KEYWORD_DICTS.clear()
+        self.assertEqual(self.load(), keywords)
+        self.assertEqual(self.parse.call_count, 1)
+
+    def test_invalidated(self):
+        self.load()
+        write_keywords(
+            self.path, {"SDG 1": ["poverty"], "SDG 6": ["water", "sanitation"]}
+        )
+
+        self.assertEqual(
+            self.load(), {"SDG 1": ["poverty"], "SDG 6": ["water", "sanitation"]}
+        )
+        self.assertEqual(self.parse.call_count, 2)
+        # Cached under the new content hash, next to the old one
+        self.assertEqual(len(os.listdir(self.cache_dir)), 2)
+
+    def test_default_cache_dir(self):
+        with mock.patch.object(keyword_resources, "KEYWORDS_CACHE_DIR", self.cache_dir):
+            load_keywords(self.path)
+        self.assertEqual(len(os.listdir(self.cache_dir)), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
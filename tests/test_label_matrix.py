@@ -0,0 +1,38 @@
+import unittest
+import pandas as pd
+from scripts.label_matrix import (
+    SDGS,
+    encode_labels,
+    decode_labels,
+    pack_labels,
+    sdg_label,
+)
+
+
+class TestLabelMatrix(unittest.TestCase):
+    def setUp(self):
+        self.labels = pd.Series([["SDG 13", "SDG 1"], [], ["SDG 16"]])
+
+    def test_encode_decode(self):
+        matrix = encode_labels(self.labels)
+        self.assertEqual(matrix.shape, (3, len(SDGS)))
+        self.assertEqual(decode_labels(matrix), [["SDG 1", "SDG 13"], [], ["SDG 16"]])
+
+    def test_sdg_label(self):
+        label_bits = pack_labels(encode_labels(self.labels))
+        for sdg in SDGS:
+            expected = [int(sdg in labels) for labels in self.labels]
+            self.assertEqual(sdg_label(label_bits, sdg).tolist(), expected)
+
+    def test_unknown_sdg(self):
+        with self.assertRaises(KeyError):
+            encode_labels(pd.Series([["SDG 17"]]))
+
+    def test_empty(self):
+        matrix = encode_labels(pd.Series([], dtype=object))
+        self.assertEqual(decode_labels(matrix), [])
+        self.assertEqual(len(pack_labels(matrix)), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
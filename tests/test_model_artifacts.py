@@ -0,0 +1,67 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import Pipeline
+from scripts import keyword_resources
+from scripts.model_artifacts import save_artifact, load_artifact, is_artifact
+from models.logistic_regression import TextAnalyticsModel
+from models.uoft_dict_approach import TextAnalyticsModel as RulesModel
+
+TEXTS = [
+    "poverty and income inequality in cities",
+    "clean water and sanitation for rural communities",
+    "machine learning for climate action",
+    "poverty reduction through education",
+    "databases and algorithms",
+    "food security and zero hunger",
+]
+
+
+class TestModelArtifacts(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(
+            self.tmp_dir.name, "SDG 1-logistic_regression.artifact"
+        )
+
+        self.model = TextAnalyticsModel("SDG 1")
+        self.model.model = Pipeline(
+            [
+                ("tfidf", TfidfVectorizer(ngram_range=(1, 2))),
+                ("classifier", LogisticRegression(C=10)),
+            ]
+        )
+        self.model.model.fit(TEXTS, [int("poverty" in text) for text in TEXTS])
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_round_trip(self):
+        save_artifact(self.model, "logistic_regression", self.path)
+        self.assertTrue(is_artifact(self.path))
+
+        loaded = load_artifact(self.path)
+        self.assertEqual(loaded.sdg, "SDG 1")
+        self.assertIsInstance(loaded.model["classifier"].coef_, np.memmap)
+
+        texts = TEXTS + ["poverty and water", "an outline with no known words", ""]
+        np.testing.assert_array_equal(
+            loaded.model.predict_proba(texts), self.model.model.predict_proba(texts)
+        )
+
+    def test_rules_model(self):
+        with mock.patch.object(
+            keyword_resources, "KEYWORDS_CACHE_DIR", self.tmp_dir.name
+        ):
+            model = RulesModel("SDG 1")
+        with self.assertRaises(ValueError):
+            save_artifact(model, "uoft_dict_approach", self.path)
+        self.assertFalse(is_artifact(self.path))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,59 @@
+import os
+import tempfile
+import unittest
+import dill
+from scripts.model_registry import ModelRegistry, get_model_names
+
+
+class TestModelRegistry(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        model_paths = {}
+        for sdg in ["SDG 1", "SDG 2", "SDG 3"]:
+            path = os.path.join(self.tmp_dir.name, f"{sdg}-test_model.dill")
+            with open(path, "wb") as file:
+                dill.dump(dict(sdg=sdg, weights=[0.0] * 100), file)
+            model_paths[(sdg, "test_model")] = path
+        model_paths[("SDG 1", "ignored_model")] = path
+        self.model_size = os.path.getsize(path)
+
+        # Room for two of the models
+        self.registry = ModelRegistry(max_bytes=2 * self.model_size)
+        self.registry.model_paths = model_paths
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_saved_models(self):
+        self.assertEqual(
+            self.registry.saved_models(ignore_models=["ignored_model"]),
+            [("SDG 1", "test_model"), ("SDG 2", "test_model"), ("SDG 3", "test_model")],
+        )
+        self.assertEqual(len(self.registry.loaded_models), 0)
+
+    def test_lru(self):
+        model = self.registry.get_model("SDG 1", "test_model")
+        self.assertEqual(model["sdg"], "SDG 1")
+        self.registry.get_model("SDG 2", "test_model")
+
+        # Using SDG 1 again makes SDG 2 the least recently used
+        self.assertIs(self.registry.get_model("SDG 1", "test_model"), model)
+        self.registry.get_model("SDG 3", "test_model")
+        self.assertEqual(
+            list(self.registry.loaded_models),
+            [("SDG 1", "test_model"), ("SDG 3", "test_model")],
+        )
+        self.assertEqual(self.registry.loaded_bytes, 2 * self.model_size)
+
+    def test_unknown_model(self):
+        with self.assertRaises(KeyError):
+            self.registry.get_model("SDG 4", "test_model")
+
+    def test_model_names(self):
+        model_names = get_model_names()
+        self.assertIn("logistic_regression", model_names)
+        self.assertNotIn("__init__", model_names)
+
+
+if __name__ == "__main__":
+    unittest.main()
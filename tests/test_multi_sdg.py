@@ -0,0 +1,93 @@
+import unittest
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import FunctionTransformer
+from scripts.base_model import TextAnalyticsFunctions
+from scripts.multi_sdg import MultiSDGPredictor, build_multi_sdg_predictor
+
+TEXTS = [
+    "poverty and income inequality in cities",
+    "clean water and sanitation for rural communities",
+    "machine learning for climate action",
+    "databases and algorithms",
+    "food security and zero hunger",
+    "renewable energy and emissions",
+    "gender equality in the workplace",
+    "ocean pollution and marine life",
+]
+
+
+class PipelineModel(TextAnalyticsFunctions):
+    def __init__(self, sdg, keyword, **tfidf_params):
+        super().__init__(sdg)
+        self.model_type = "ml"
+        self.model = Pipeline(
+            [
+                ("tfidf", TfidfVectorizer(**tfidf_params)),
+                ("classifier", LogisticRegression()),
+            ]
+        )
+        labels = [int(keyword in text) for text in TEXTS]
+        self.model.fit(TEXTS, labels)
+
+    def predict_ml_model(self, text):
+        probs = self.model.predict_proba([text])
+        prediction = probs.argmax(axis=1)[0]
+        return prediction, {"confidence": probs[0, prediction]}
+
+
+class TestMultiSDGPredictor(unittest.TestCase):
+    def setUp(self):
+        self.models = {
+            "SDG 1": PipelineModel("SDG 1", "poverty"),
+            "SDG 6": PipelineModel("SDG 6", "water", ngram_range=(1, 2)),
+            "SDG 13": PipelineModel("SDG 13", "climate", max_features=10),
+        }
+        self.texts = TEXTS + ["an outline with no known words", ""]
+
+    def test_matches_separate_models(self):
+        results = MultiSDGPredictor(self.models).predict_batch(self.texts)
+        for sdg, model in self.models.items():
+            expected = model.predict_batch(self.texts)
+            self.assertEqual(
+                [p["prediction"] for p in results[sdg]],
+                [p["prediction"] for p in expected],
+            )
+            np.testing.assert_allclose(
+                [p["metadata"]["confidence"] for p in results[sdg]],
+                [p["metadata"]["confidence"] for p in expected],
+            )
+
+    def test_mismatched_vectorizers(self):
+        self.models["SDG 5"] = PipelineModel("SDG 5", "gender", lowercase=False)
+        with self.assertRaises(ValueError):
+            MultiSDGPredictor(self.models)
+
+        # Falls back to scoring each SDG separately
+        results = build_multi_sdg_predictor(self.models).predict_batch(self.texts)
+        self.assertEqual(set(results), set(self.models))
+
+    def test_mismatched_binary_and_dtype(self):
+        for params in [dict(binary=True), dict(dtype=np.float32)]:
+            models = dict(
+                self.models, **{"SDG 5": PipelineModel("SDG 5", "gender", **params)}
+            )
+            with self.assertRaises(ValueError):
+                MultiSDGPredictor(models)
+
+    def test_mismatched_preprocessors(self):
+        pipeline = self.models["SDG 1"].model
+        pipeline.steps.insert(
+            0, ("preprocessor", FunctionTransformer(lambda texts: list(texts)))
+        )
+        with self.assertRaises(ValueError):
+            MultiSDGPredictor(self.models)
+
+        results = build_multi_sdg_predictor(self.models).predict_batch(self.texts)
+        self.assertEqual(set(results), set(self.models))
+
+
+if __name__ == "__main__":
+    unittest.main()
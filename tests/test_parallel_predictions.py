@@ -0,0 +1,178 @@
+import importlib.util
+import multiprocessing
+import os
+import tempfile
+import unittest
+from unittest import mock
+import pandas as pd
+from scripts import run_models
+from scripts.base_model import TextAnalyticsFunctions
+from scripts.prediction_writer import PredictionWriter
+from scripts.instrumentation import METRICS_PATH_ENV
+from scripts.storage import get_storage
+
+HAS_PYARROW = importlib.util.find_spec("pyarrow") is not None
+
+TEXTS = [f"outline {i} on {'water' if i % 3 == 0 else 'poverty'}" for i in range(23)]
+SDGS = ["SDG 1", "SDG 6"]
+
+
+class KeywordModel(TextAnalyticsFunctions):
+    def __init__(self, sdg, fail_text=None):
+        super().__init__(sdg)
+        self.model_type = "rules"
+        self.model = "ignore"
+        self.fail_text = fail_text
+
+    def predict_rules_model(self, text):
+        if text == self.fail_text:
+            raise ValueError("Scoring failed.")
+        return int("water" in text), {"spans": []}
+
+
+class KeywordRegistry:
+    """Stands in for ModelRegistry, with a KeywordModel saved for every SDG."""
+
+    # Text the models fail on, set before the worker processes are forked
+    fail_text = None
+
+    def __init__(self, max_bytes=None, prediction_cache=None):
+        self.prediction_cache = prediction_cache
+
+    def saved_models(self, ignore_models=()):
+        return [(sdg, "keyword_model") for sdg in SDGS]
+
+    def get_model(self, sdg, model_name):
+        return KeywordModel(sdg, self.fail_text)
+
+
+def load_rows(path, start, stop, columns=None):
+    return pd.DataFrame({"text": TEXTS[start:stop]}, index=range(start, stop))
+
+
+@unittest.skipUnless(
+    multiprocessing.get_start_method() == "fork",
+    "the workers only see the test models when forked",
+)
+class TestParallelPredictions(unittest.TestCase):
+    extension = ".jsonl"
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.output_dir = None
+        patches = dict(
+            ModelRegistry=KeywordRegistry,
+            PREDICTIONS_TEMPLATE=self.prediction_path,
+            prediction_fingerprint=lambda *args: "fingerprint",
+            get_datatype_paths=lambda datatype, sdg: {"tiny": "tiny.jsonl"},
+            get_file_path=lambda *args: "tiny.jsonl",
+            count_rows=lambda path, columns=None: len(TEXTS),
+            load_rows=load_rows,
+            iterdatatype_data=lambda datatype, sdg, columns=None: iter(
+                [("tiny", pd.DataFrame({"text": TEXTS}))]
+            ),
+        )
+        self.patches = [
+            mock.patch.object(run_models, name, value)
+            for name, value in patches.items()
+        ]
+        self.patches.append(mock.patch.dict(os.environ, {METRICS_PATH_ENV: ""}))
+        for patch in self.patches:
+            patch.start()
+
+    def tearDown(self):
+        for patch in self.patches:
+            patch.stop()
+        self.tmp_dir.cleanup()
+
+    def prediction_path(self, sdg, model_name, project_name, datatype):
+        return os.path.join(
+            self.output_dir,
+            f"{sdg}-{model_name}-{project_name}-{datatype}__predictions{self.extension}",
+        )
+
+    def use_output_dir(self, name):
+        self.output_dir = os.path.join(self.tmp_dir.name, name)
+        os.makedirs(self.output_dir)
+
+    def predict_serial(self):
+        self.use_output_dir("serial")
+        run_models.predict_models_single_sdg("test", batch_size=4)
+
+    def predict_parallel(self, max_workers=3):
+        return run_models.predict_models_parallel(
+            "test", batch_size=4, use_cache=False, max_workers=max_workers, shard_rows=5
+        )
+
+    def assert_same_predictions(self):
+        self.assertEqual(
+            sorted(os.listdir(self.output_dir)),
+            sorted(os.listdir(os.path.join(self.tmp_dir.name, "serial"))),
+        )
+        for sdg in SDGS:
+            path = self.prediction_path(sdg, "keyword_model", "tiny", "test")
+            serial_path = os.path.join(
+                self.tmp_dir.name, "serial", os.path.basename(path)
+            )
+            self.assert_same_file(path, serial_path)
+
+    def assert_same_file(self, path, expected_path):
+        with open(path, "rb") as file, open(expected_path, "rb") as expected_file:
+            self.assertEqual(file.read(), expected_file.read())
+
+    def test_same_as_serial(self):
+        self.predict_serial()
+        self.use_output_dir("parallel")
+        self.assertEqual(self.predict_parallel(), len(SDGS) * len(TEXTS))
+        self.assert_same_predictions()
+
+    def test_resume(self):
+        self.predict_serial()
+        serial_path = os.path.join(
+            self.tmp_dir.name,
+            "serial",
+            os.path.basename(
+                self.prediction_path("SDG 1", "keyword_model", "tiny", "test")
+            ),
+        )
+        records = get_storage(serial_path).load(serial_path).to_dict("records")
+
+        # A run stopped halfway through the SDG 1 file
+        self.use_output_dir("parallel")
+        path = self.prediction_path("SDG 1", "keyword_model", "tiny", "test")
+        writer = PredictionWriter(path, "fingerprint")
+        writer.write(records[:10])
+
+        self.assertEqual(self.predict_parallel(), 2 * len(TEXTS) - 10)
+        self.assert_same_predictions()
+
+    def test_failing_shard(self):
+        self.predict_serial()
+        self.use_output_dir("parallel")
+        with mock.patch.object(KeywordRegistry, "fail_text", TEXTS[12]):
+            with self.assertRaises(ValueError):
+                self.predict_parallel(max_workers=1)
+
+        # The shards before the failing one are kept, and the file isn't finished
+        path = self.prediction_path("SDG 1", "keyword_model", "tiny", "test")
+        self.assertFalse(os.path.exists(path))
+        self.assertEqual(PredictionWriter(path, "fingerprint").completed_rows, 10)
+
+        self.assertEqual(self.predict_parallel(), 2 * len(TEXTS) - 10)
+        self.assert_same_predictions()
+
+
+@unittest.skipUnless(HAS_PYARROW, "pyarrow is not installed")
+class TestParallelParquetPredictions(TestParallelPredictions):
+    extension = ".parquet"
+
+    def assert_same_file(self, path, expected_path):
+        # Row groups follow the chunks the files were written in, so only the
+        # contents are the same
+        pd.testing.assert_frame_equal(
+            get_storage(path).load(path), get_storage(expected_path).load(expected_path)
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
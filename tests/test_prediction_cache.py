@@ -0,0 +1,130 @@
+import os
+import tempfile
+import unittest
+from scripts.base_model import TextAnalyticsFunctions
+from scripts.prediction_cache import PredictionCache, text_hash
+from scripts.run_models import score_multi_sdg
+
+
+class KeywordModel(TextAnalyticsFunctions):
+    def __init__(self, sdg):
+        super().__init__(sdg)
+        self.model_type = "rules"
+        self.model = "ignore"
+        self.scored = []
+
+    def predict_rules_model(self, text):
+        self.scored.append(text)
+        return int("water" in text), {"spans": [[0, 5, "water"]]}
+
+
+class MultiSDGKeywordModel:
+    def __init__(self, sdgs):
+        self.sdgs = sdgs
+        self.scored = []
+
+    def predict_batch(self, texts):
+        self.scored.extend(texts)
+        return {
+            sdg: [dict(category=sdg, prediction=int("water" in text)) for text in texts]
+            for sdg in self.sdgs
+        }
+
+
+class TestPredictionCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, "predictions.sqlite")
+        self.cache = PredictionCache(self.path)
+
+    def tearDown(self):
+        self.cache.close()
+        self.tmp_dir.cleanup()
+
+    def test_model_predictions(self):
+        model = KeywordModel("SDG 6")
+        model.use_prediction_cache(self.cache, "model-a")
+        texts = ["water", "poverty", "water"]
+        water = dict(
+            category="SDG 6", prediction=1, metadata={"spans": [[0, 5, "water"]]}
+        )
+        poverty = dict(
+            category="SDG 6", prediction=0, metadata={"spans": [[0, 5, "water"]]}
+        )
+        expected = [water, poverty, water]
+
+        self.assertEqual(model.predict_batch(texts), expected)
+        self.assertEqual(model.scored, ["water", "poverty"])
+
+        # Cached across instances, but not for another version of the model
+        self.cache.close()
+        self.cache = PredictionCache(self.path)
+        model.use_prediction_cache(self.cache, "model-a")
+        self.assertEqual(model.predict("poverty"), poverty)
+        self.assertEqual(
+            model.predict_batch(texts + ["clean water"]), expected + [water]
+        )
+        self.assertEqual(model.scored, ["water", "poverty", "clean water"])
+        self.assertEqual(self.cache.stats()["hits"], 3)
+
+        model.use_prediction_cache(self.cache, "model-b")
+        model.predict("water")
+        self.assertEqual(model.scored[-1], "water")
+
+    def test_evict(self):
+        prediction = dict(category="SDG 6", prediction=1, metadata={})
+        for text in ["a", "b", "c"]:
+            self.cache.put_many({text_hash(text): prediction}, "SDG 6", "model-a")
+        self.cache.get_many([text_hash("a")], "SDG 6", "model-a")
+
+        # Room for two predictions, "b" is the least recently used
+        (size,) = self.cache.connection.execute(
+            "SELECT size FROM predictions LIMIT 1"
+        ).fetchone()
+        self.cache.max_bytes = 2 * size
+        self.cache.evict()
+        cached = self.cache.get_many(
+            [text_hash(text) for text in ["a", "b", "c"]], "SDG 6", "model-a"
+        )
+        self.assertEqual(set(cached), {text_hash("a"), text_hash("c")})
+
+    def test_evict_batch(self):
+        # Predictions cached together are evicted one by one, not as a batch
+        prediction = dict(category="SDG 6", prediction=1, metadata={})
+        keys = [text_hash(text) for text in ["a", "b", "c"]]
+        self.cache.put_many(dict.fromkeys(keys, prediction), "SDG 6", "model-a")
+        (size,) = self.cache.connection.execute(
+            "SELECT size FROM predictions LIMIT 1"
+        ).fetchone()
+        self.cache.max_bytes = 2 * size
+        self.cache.evict()
+        self.assertEqual(len(self.cache.get_many(keys, "SDG 6", "model-a")), 2)
+
+    def test_multi_sdg_partial_hit(self):
+        model_hashes = {"SDG 1": "model-1", "SDG 6": "model-6"}
+        cached = dict(category="cached", prediction=0)
+        for sdg, model_hash in model_hashes.items():
+            self.cache.put_many({text_hash("poverty"): cached}, sdg, model_hash)
+        self.cache.put_many({text_hash("water"): cached}, "SDG 1", "model-1")
+
+        # Only texts that every SDG has cached are skipped
+        predictor = MultiSDGKeywordModel(list(model_hashes))
+        texts = ["water", "poverty", "clean water"]
+        predictions = score_multi_sdg(
+            predictor, texts, model_hashes, self.cache, batch_size=1
+        )
+        self.assertEqual(predictor.scored, ["water", "clean water"])
+        self.assertEqual(predictions["SDG 6"][0]["prediction"], 1)
+        self.assertEqual(predictions["SDG 1"][1], cached)
+        self.assertEqual(predictions["SDG 6"][1], cached)
+
+        predictor.scored = []
+        self.assertEqual(
+            score_multi_sdg(predictor, texts, model_hashes, self.cache, batch_size=1),
+            predictions,
+        )
+        self.assertEqual(predictor.scored, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
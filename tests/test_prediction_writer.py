@@ -0,0 +1,62 @@
+import os
+import tempfile
+import unittest
+import pandas as pd
+from scripts.prediction_writer import PredictionWriter, write_part
+
+
+class TestPredictionWriter(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, "predictions.jsonl")
+        self.chunks = [
+            [dict(index=0, prediction=dict(prediction=1))],
+            [
+                dict(index=1, prediction=dict(prediction=0)),
+                dict(index=2, prediction=dict(prediction=1)),
+            ],
+        ]
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_resume(self):
+        writer = PredictionWriter(self.path, "model-a")
+        writer.write(self.chunks[0])
+
+        # A new writer, e.g. after a crash, continues after the written chunk
+        writer = PredictionWriter(self.path, "model-a")
+        self.assertEqual(writer.completed_rows, 1)
+        writer.write(self.chunks[1])
+        writer.finish()
+
+        data = pd.read_json(self.path, lines=True)
+        self.assertEqual(data["index"].tolist(), [0, 1, 2])
+        self.assertFalse(os.path.exists(f"{self.path}.parts"))
+
+    def test_new_fingerprint(self):
+        writer = PredictionWriter(self.path, "model-a")
+        writer.write(self.chunks[0])
+
+        writer = PredictionWriter(self.path, "model-b")
+        self.assertEqual(writer.completed_rows, 0)
+        self.assertEqual(writer.parts, [])
+
+    def test_add_part(self):
+        # Parts written elsewhere, e.g. by worker processes, are added in row order
+        writer = PredictionWriter(self.path, "model-a")
+        for i, chunk in enumerate(self.chunks):
+            write_part(chunk, os.path.join(writer.parts_dir, f"shard-{i}.jsonl"))
+        writer.add_part("shard-0.jsonl", 1)
+
+        writer = PredictionWriter(self.path, "model-a")
+        self.assertEqual(writer.parts, ["shard-0.jsonl"])
+        writer.add_part("shard-1.jsonl", 2)
+        writer.finish()
+
+        data = pd.read_json(self.path, lines=True)
+        self.assertEqual(data["index"].tolist(), [0, 1, 2])
+
+
+if __name__ == "__main__":
+    unittest.main()
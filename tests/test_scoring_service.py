@@ -0,0 +1,118 @@
+import json
+import threading
+import unittest
+import urllib.error
+import urllib.request
+from scripts.scoring_service import ScoringService, ScoringServer
+
+
+class KeywordPredictor:
+    """Predicts an SDG when its keyword is in the text, and records each batch."""
+
+    def __init__(self, keywords):
+        self.keywords = keywords
+        self.batch_sizes = []
+
+    def predict_batch(self, texts):
+        self.batch_sizes.append(len(texts))
+        return {
+            sdg: [
+                dict(category=sdg, prediction=int(keyword in text), metadata={})
+                for text in texts
+            ]
+            for sdg, keyword in self.keywords.items()
+        }
+
+
+class TestScoringService(unittest.TestCase):
+    def setUp(self):
+        self.predictor = KeywordPredictor({"SDG 1": "poverty", "SDG 6": "water"})
+        self.service = ScoringService(
+            {"keywords": self.predictor}, max_batch_size=100, max_wait=0.05
+        )
+        self.service.start()
+        self.server = ScoringServer(
+            ("127.0.0.1", 0), self.service, {"keywords": ["SDG 1", "SDG 6"]}
+        )
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+        self.server_thread = threading.Thread(target=self.server.serve_forever)
+        self.server_thread.start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.server_thread.join()
+        self.service.stop()
+
+    def request(self, path, data=None):
+        body = None if data is None else json.dumps(data).encode()
+        with urllib.request.urlopen(self.url + path, data=body) as response:
+            return json.loads(response.read())
+
+    def test_predict(self):
+        response = self.request("/predict", dict(texts=["water and poverty", "math"]))
+        predictions = [text["keywords"] for text in response["predictions"]]
+        self.assertEqual(
+            predictions,
+            [
+                [
+                    dict(category="SDG 1", prediction=1, metadata={}),
+                    dict(category="SDG 6", prediction=1, metadata={}),
+                ],
+                [
+                    dict(category="SDG 1", prediction=0, metadata={}),
+                    dict(category="SDG 6", prediction=0, metadata={}),
+                ],
+            ],
+        )
+
+    def test_micro_batching(self):
+        texts = [f"outline {i} about water" for i in range(8)]
+        responses = {}
+
+        def send(text):
+            responses[text] = self.request("/predict", dict(texts=[text]))
+
+        threads = [threading.Thread(target=send, args=(text,)) for text in texts]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        # Every request gets its own predictions, from fewer scoring calls
+        for text in texts:
+            self.assertEqual(
+                responses[text]["predictions"][0]["keywords"][1]["prediction"], 1
+            )
+        self.assertLess(len(self.predictor.batch_sizes), len(texts))
+        self.assertEqual(sum(self.predictor.batch_sizes), len(texts))
+
+        stats = self.request("/stats")
+        self.assertEqual(stats["requests"], len(texts))
+        self.assertEqual(stats["queue_depth"], 0)
+        self.assertIsNotNone(stats["latency_ms"]["p95"])
+
+    def test_bad_request(self):
+        with self.assertRaises(urllib.error.HTTPError) as context:
+            self.request("/predict", dict(text="not a list"))
+        self.assertEqual(context.exception.code, 400)
+        self.assertEqual(self.request("/models"), {"keywords": ["SDG 1", "SDG 6"]})
+
+    def test_stop_before_start(self):
+        service = ScoringService({"keywords": self.predictor})
+        service.stop()
+        self.assertIsNone(service.thread)
+
+    def test_predict_after_stop(self):
+        service = ScoringService({"keywords": self.predictor})
+        service.start()
+        self.assertEqual(len(service.predict(["water"])), 1)
+        service.stop()
+        with self.assertRaises(RuntimeError):
+            service.predict(["water"])
+        # Stopping twice is fine
+        service.stop()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,100 @@
+import importlib.util
+import os
+import tempfile
+import unittest
+import pandas as pd
+from scripts.storage import get_storage
+
+HAS_PYARROW = importlib.util.find_spec("pyarrow") is not None
+
+
+class TestStorage(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.data = pd.DataFrame(
+            {
+                "text": ["Ending poverty", "Climate action"],
+                "labels": [["SDG 1"], ["SDG 13", "SDG 7"]],
+                "prediction": [{"prediction": 1}, {"prediction": 0}],
+            }
+        )
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def round_trip(self, extension, columns=None):
+        path = os.path.join(self.tmp_dir.name, f"data{extension}")
+        storage = get_storage(path)
+        storage.save(self.data, path)
+        return storage.load(path, columns=columns)
+
+    def test_jsonl(self):
+        pd.testing.assert_frame_equal(self.round_trip(".jsonl"), self.data)
+
+    @unittest.skipUnless(HAS_PYARROW, "pyarrow is not installed")
+    def test_parquet(self):
+        pd.testing.assert_frame_equal(
+            self.round_trip(".parquet"), self.data, check_dtype=False
+        )
+
+    @unittest.skipUnless(HAS_PYARROW, "pyarrow is not installed")
+    def test_parquet_columns(self):
+        data = self.round_trip(".parquet", columns=["labels"])
+        self.assertEqual(list(data.columns), ["labels"])
+        self.assertEqual(data["labels"].tolist(), self.data["labels"].tolist())
+
+    def chunked_round_trip(self, extension):
+        path = os.path.join(self.tmp_dir.name, f"data{extension}")
+        storage = get_storage(path)
+        with storage.open_writer(path) as writer:
+            writer.write(self.data.iloc[:1])
+            writer.write(self.data.iloc[1:])
+        chunks = list(storage.iter_chunks(path, chunksize=1, columns=["labels"]))
+        self.assertEqual(len(chunks), 2)
+        self.assertEqual(
+            [labels for chunk in chunks for labels in chunk["labels"]],
+            self.data["labels"].tolist(),
+        )
+        return storage.load(path)
+
+    def test_jsonl_chunks(self):
+        pd.testing.assert_frame_equal(self.chunked_round_trip(".jsonl"), self.data)
+
+    @unittest.skipUnless(HAS_PYARROW, "pyarrow is not installed")
+    def test_parquet_chunks(self):
+        pd.testing.assert_frame_equal(
+            self.chunked_round_trip(".parquet"), self.data, check_dtype=False
+        )
+
+    @unittest.skipUnless(HAS_PYARROW, "pyarrow is not installed")
+    def test_parquet_null_first_chunk(self):
+        # Columns with only nulls in the first chunk can hold anything later
+        path = os.path.join(self.tmp_dir.name, "data.parquet")
+        storage = get_storage(path)
+        with storage.open_writer(path) as writer:
+            writer.write(pd.DataFrame({"metadata": [None], "url": [None]}))
+            writer.write(pd.DataFrame({"metadata": [{"k": 1}], "url": ["a.html"]}))
+            writer.write(pd.DataFrame({"metadata": [None], "url": [None]}))
+        data = storage.load(path)
+        self.assertEqual(data["metadata"].tolist(), [None, {"k": 1}, None])
+        self.assertEqual(data["url"].isna().tolist(), [True, False, True])
+        self.assertEqual(data["url"][1], "a.html")
+
+    @unittest.skipUnless(HAS_PYARROW, "pyarrow is not installed")
+    def test_parquet_declared_json_columns(self):
+        path = os.path.join(self.tmp_dir.name, "data.parquet")
+        storage = get_storage(path)
+        with storage.open_writer(path, json_columns=["labels"]) as writer:
+            writer.write(pd.DataFrame({"labels": ["SDG 1"], "text": ["a"]}))
+            writer.write(pd.DataFrame({"labels": [["SDG 2"]], "text": ["b"]}))
+            with self.assertRaises(ValueError):
+                writer.write(pd.DataFrame({"labels": [[]], "text": [["c"]]}))
+        self.assertEqual(storage.load(path)["labels"].tolist(), ["SDG 1", ["SDG 2"]])
+
+    def test_unsupported_extension(self):
+        with self.assertRaises(ValueError):
+            get_storage("data.csv")
+
+
+if __name__ == "__main__":
+    unittest.main()
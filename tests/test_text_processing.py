@@ -0,0 +1,61 @@
+import os
+import tempfile
+import unittest
+from scripts.text_processing import TextNormalizer, TokenCache, get_normalizer
+
+
+class TestTextNormalizer(unittest.TestCase):
+    def setUp(self):
+        self.normalizer = TextNormalizer(stem_cache_size=2)
+
+    def test_normalize(self):
+        result = self.normalizer.normalize("The students are learning")
+        self.assertEqual(result, "student learn")
+
+    def test_stem_cache(self):
+        self.normalizer.normalize_all(["learning learning", "learning"])
+        cache_info = self.normalizer.cache_info()
+        self.assertEqual(cache_info.misses, 1)
+        self.assertEqual(cache_info.hits, 2)
+
+    def test_bounded_cache(self):
+        self.normalizer.normalize("students learning classes courses")
+        self.assertEqual(self.normalizer.cache_info().currsize, 2)
+
+    def test_shared_normalizer(self):
+        self.assertIs(get_normalizer(), get_normalizer())
+
+
+class TestTokenCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, "project__tokens.jsonl")
+        self.texts = ["The students are learning", "Ending poverty"]
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_persisted_tokens(self):
+        token_cache = TokenCache(self.path)
+        expected = token_cache.normalize_all(self.texts)
+        token_cache.save()
+
+        normalizer = TextNormalizer()
+        reloaded_cache = TokenCache(self.path, normalizer)
+        self.assertEqual(reloaded_cache.normalize_all(self.texts), expected)
+        self.assertEqual(normalizer.cache_info().misses, 0)
+        self.assertFalse(reloaded_cache.updated)
+
+    def test_new_texts(self):
+        token_cache = TokenCache(self.path)
+        token_cache.normalize_all(self.texts[:1])
+        token_cache.save()
+
+        reloaded_cache = TokenCache(self.path)
+        reloaded_cache.normalize_all(self.texts)
+        self.assertTrue(reloaded_cache.updated)
+        self.assertEqual(len(reloaded_cache.tokens), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()